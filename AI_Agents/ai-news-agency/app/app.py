@@ -1,21 +1,61 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, abort
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import select, update, inspect, text, or_, and_
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from sqlalchemy.orm import deferred, load_only
+from datetime import datetime, timedelta
 import sys
 import os
-import json
 import time
 import logging
 import threading
-import traceback
+import atexit
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from journalist_agent.main import generate_article
 import jinja2
 from markupsafe import Markup
 import re
 import html
+from html.parser import HTMLParser
+import orjson
+from collections import defaultdict
+from functools import lru_cache
+from cachetools import TTLCache
+
+# Precompiled patterns used by safe_json_loads
+_RE_BACKSLASH = re.compile(r'([^\\])\\([^\\"/bfnrtu])')
+_RE_INNER_QUOTE = re.compile(r'([^\\])"([^"]*[^\\])"([^:,\s\}\]])')
+_RE_MONEY = re.compile(r'(\s)(\$\d+)([MBK])(\s)')
+# Control characters [\x00-\x08\x0B-\x0C\x0E-\x1F\x7F], for single-pass removal with str.translate
+_CTRL_TABLE = dict.fromkeys(list(range(0, 9)) + [11, 12] + list(range(14, 32)) + [0x7F], None)
+_RE_KEY_NOQUOTE = re.compile(r'([{,])\s*([a-zA-Z0-9_]+)\s*:')
+_RE_OPEN_QUOTES = re.compile(r'(?<![\\])"(?![\s]*[:,\]}])')
+_RE_DELIMITER = re.compile(r'[,\]}]')
+
+# Precompiled patterns used when post-processing generated articles
+_RE_HREF_SRC_FIX = re.compile(r'(href|src)=([\'"])((?!https?://)[^\'"]+)([\'"])')
+_RE_BARE_URL = re.compile(r'https?://[^\s<>"\']+')
+_RE_IMG_PATH = re.compile(r'(?:images|static)/.*?$')
+# Precompiled patterns used by convert_markdown_to_html
+_RE_MD_LINK = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+_RE_MD_LABEL = re.compile(r'(Author|Published Date):\s+(?=[^\n])|Source URL:\s+')
+_RE_MD_PARA = re.compile(r'\n\n+')
+_RE_MD_HEADER = re.compile(r'<p>(#{1,6})\s+(.+?)</p>')
+_RE_MD_BOLD = re.compile(r'\*\*(.+?)\*\*')
+_RE_MD_ITALIC = re.compile(r'\*([^\*]+?)\*')
+_REGEX_FIELD_PATTERNS = {field: re.compile(pattern) for field, pattern in {
+    'title': r'"(?:article_)?title":\s*"([^"]+(?:\\.[^"]+)*)"',
+    'summary': r'"(?:article_)?summary":\s*"([^"]+(?:\\.[^"]+)*)"',
+    'linkedin_post': r'"linkedin_post":\s*"([^"]+(?:\\.[^"]+)*)"',
+    'twitter_post': r'"twitter_post":\s*"([^"]+(?:\\.[^"]+)*)"',
+    'image_path': r'"image_path":\s*"([^"]+)"',
+    'image_relative_path': r'"image_relative_path":\s*"([^"]+)"',
+    'image_prompt': r'"image_prompt":\s*"([^"]+(?:\\.[^"]+)*)"',
+    'image_url': r'"image_url":\s*"([^"]+)"'
+}.items()}
 
 # Configure logging
 logging.basicConfig(
@@ -68,11 +108,31 @@ if DB_TYPE == 'postgres':
     else:
         app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
         logger.info(f"Using PostgreSQL database at {DB_HOST}:{DB_PORT}/{DB_NAME} without SSL")
+    
+    # Connection pool shared by request threads and background generation workers
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '5')),
+        'pool_pre_ping': True,  # Detect connections dropped by the server
+        'pool_recycle': 1800,  # Recycle connections older than 30 minutes
+        'pool_use_lifo': True,
+        # Group INSERT/UPDATE executemany calls into batched statements
+        'executemany_mode': 'values_plus_batch',
+        'insertmanyvalues_page_size': 1000,
+    }
 else:
     # SQLite configuration (default)
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///news_v3.db'
     logger.info("Using SQLite database")
+    
+    # Allow connections to be used from background generation workers
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_pre_ping': True,
+        'connect_args': {'check_same_thread': False},
+    }
 
+# Keep more compiled statements in SQLAlchemy's per-engine cache (default is 500)
+app.config['SQLALCHEMY_ENGINE_OPTIONS']['query_cache_size'] = 1200
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
@@ -83,67 +143,147 @@ login_manager.login_view = 'login'
 login_manager.login_message = 'Please login to access this page.'
 login_manager.login_message_category = 'info'
 
-# Add nl2br filter for converting line breaks to HTML
-@app.template_filter('nl2br')
+# Password hashing method in werkzeug format, e.g. "scrypt:32768:8:1" or
+# "pbkdf2:sha256:600000"; lets production tune the KDF cost per deployment
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+
+# Shared worker pool for background article generation.
+# Bounded so that a burst of requests cannot exhaust threads or DB connections.
+GEN_WORKERS = int(os.getenv('GEN_WORKERS', '4'))
+EXECUTOR = ThreadPoolExecutor(max_workers=GEN_WORKERS, thread_name_prefix='article-gen')
+atexit.register(EXECUTOR.shutdown, wait=False)
+# Seconds after which an article still in 'processing' is treated as abandoned
+# (worker killed, restart, OOM) and may be regenerated or claimed again
+GEN_STALE_AFTER = int(os.getenv('GEN_STALE_AFTER', '3600'))
+
+# nl2br filter for converting line breaks to HTML.
+# Cached because list pages render the same summaries over and over.
+@lru_cache(maxsize=2048)
 def nl2br_filter(text):
     if not text:
         return ""
+    if '\n' not in text:
+        return Markup(text)
     return Markup(text.replace('\n', '<br>'))
 
+app.jinja_env.filters['nl2br'] = nl2br_filter
+
 class User(UserMixin, db.Model):
     """User model for authentication and article ownership"""
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(100), unique=True, nullable=False)
+    username = db.Column(db.String(100), unique=True, index=True, nullable=False)
     password_hash = db.Column(db.String(200), nullable=False)
     articles = db.relationship('Article', backref='author', lazy=True, cascade="all, delete-orphan")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
         """Set password hash from plain text password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
 
     def check_password(self, password):
         """Check if plain text password matches hash"""
         return check_password_hash(self.password_hash, password)
 
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a binary column"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(value.encode('utf-8'))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Uncompressed row in a SQLite column created as TEXT
+            return value
+        value = bytes(value)
+        try:
+            return zlib.decompress(value).decode('utf-8')
+        except zlib.error:
+            # Rows written before compression was introduced
+            return value.decode('utf-8', errors='replace')
+
 class Article(db.Model):
     """Article model for storing generated news articles"""
     id = db.Column(db.Integer, primary_key=True)
     topic = db.Column(db.String(200), nullable=False)
     urls = db.Column(db.Text, nullable=False)  # Stored as JSON string
-    content = db.Column(db.Text, nullable=False)
+    # Large text columns are deferred so list queries don't fetch them;
+    # the "body" group is loaded together on first access
+    content = deferred(db.Column(db.Text, nullable=False), group='body')
     title = db.Column(db.String(300), nullable=True)  # Article title
     summary = db.Column(db.String(250), nullable=True)  # Brief description for social media and SEO
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, processing, completed, error
+    processing_started_at = db.Column(db.DateTime, nullable=True)  # When a worker claimed the article
     # New fields for extended functionality
     image_url = db.Column(db.String(500), nullable=True)  # URL of generated image
     image_path = db.Column(db.String(500), nullable=True)  # Local path to saved image
     image_prompt = db.Column(db.Text, nullable=True)  # Prompt used for image generation
-    linkedin_post = db.Column(db.Text, nullable=True)  # Post content for LinkedIn
-    twitter_post = db.Column(db.Text, nullable=True)  # Post content for Twitter/X
-    raw_response = db.Column(db.Text, nullable=True)  # Raw response from the LLM
+    linkedin_post = deferred(db.Column(db.Text, nullable=True), group='body')  # Post content for LinkedIn
+    twitter_post = deferred(db.Column(db.Text, nullable=True), group='body')  # Post content for Twitter/X
+    raw_response = deferred(db.Column(CompressedText, nullable=True))  # Raw response from the LLM, compressed
 
     def set_urls(self, url_list):
         """Convert URL list to JSON string for storage"""
-        self.urls = json.dumps(url_list)
+        self.urls = orjson.dumps(url_list).decode()
 
     def get_urls(self):
         """Convert stored JSON string to URL list"""
-        return json.loads(self.urls)
+        return orjson.loads(self.urls)
+
+def _processing_is_stale():
+    """SQL condition: the current claim is older than GEN_STALE_AFTER (or predates claim timestamps)"""
+    cutoff = datetime.utcnow() - timedelta(seconds=GEN_STALE_AFTER)
+    return or_(Article.processing_started_at.is_(None), Article.processing_started_at < cutoff)
+
+# Serves the per-user listing on the index page (filter by user, newest first)
+article_user_created_index = db.Index('ix_article_user_created', Article.user_id, Article.created_at.desc())
+
+# Article column names, for checking which extracted fields can be stored
+_ARTICLE_ATTRS = frozenset(column.key for column in Article.__table__.columns)
+
+# Fields holding URLs, paths and prompts: stored as-is, without HTML unescaping
+_PLAINTEXT_FIELDS = frozenset({'image_url', 'image_path', 'image_prompt'})
+
+# Cache of authenticated users so that not every request hits the database
+_USER_CACHE = TTLCache(maxsize=1024, ttl=int(os.getenv('USER_CACHE_TTL', '300')))
+_USER_LOCK = threading.Lock()
+
+def invalidate_user_cache(user_id):
+    """Remove user from the login cache (on logout or account changes)"""
+    with _USER_LOCK:
+        _USER_CACHE.pop(int(user_id), None)
 
 @login_manager.user_loader
 def load_user(user_id):
     """Load user by ID for Flask-Login"""
-    return db.session.get(User, int(user_id))
+    user_id = int(user_id)
+    with _USER_LOCK:
+        cached = _USER_CACHE.get(user_id)
+    
+    if cached is None:
+        user = db.session.get(User, user_id)
+        if user:
+            with _USER_LOCK:
+                _USER_CACHE[user_id] = (user.id, user.username, user.password_hash)
+        return user
+    
+    # Build a detached user from the cached fields, no DB round-trip needed
+    cached_id, username, password_hash = cached
+    return User(id=cached_id, username=username, password_hash=password_hash)
 
 def create_default_admin():
     """Create default admin user if it doesn't exist"""
     default_admin = os.getenv('DEFAULT_ADMIN_USERNAME', 'admin')
     default_password = os.getenv('DEFAULT_ADMIN_PASSWORD', 'admin123')
     
-    if not db.session.query(User).filter_by(username=default_admin).first():
+    if db.session.execute(select(User.id).filter_by(username=default_admin)).scalar_one_or_none() is None:
         logger.info(f"Creating default admin user: {default_admin}")
         admin = User(username=default_admin)
         admin.set_password(default_password)
@@ -151,12 +291,42 @@ def create_default_admin():
         db.session.commit()
         logger.info("Default admin user created successfully")
 
+def _migrate_raw_response_column():
+    """
+    Convert article.raw_response from TEXT to bytea on PostgreSQL databases
+    created before it was compressed (create_all doesn't alter tables).
+    SQLite stores the compressed bytes in the old column as is.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    columns = {column['name']: column['type'] for column in inspect(db.engine).get_columns('article')}
+    if isinstance(columns.get('raw_response'), LargeBinary):
+        return
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "ALTER TABLE article ALTER COLUMN raw_response TYPE bytea "
+            "USING convert_to(raw_response, 'UTF8')"
+        ))
+    logger.info("Converted article.raw_response column to bytea")
+
+def _add_missing_columns():
+    """Add columns introduced after the first release to existing tables (create_all doesn't alter tables)"""
+    article_columns = {column['name'] for column in inspect(db.engine).get_columns('article')}
+    if 'processing_started_at' not in article_columns:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE article ADD COLUMN processing_started_at TIMESTAMP'))
+        logger.info("Added processing_started_at column to article table")
+
 # Initialize database and create default admin
 with app.app_context():
     try:
         logger.info("Initializing database")
         # Always create tables when starting the application
         db.create_all()
+        _migrate_raw_response_column()
+        _add_missing_columns()
+        # create_all skips indexes of tables that already exist
+        article_user_created_index.create(db.engine, checkfirst=True)
         create_default_admin()
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
@@ -171,7 +341,7 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        user = User.query.filter_by(username=username).first()
+        user = db.session.execute(select(User).filter_by(username=username)).scalar_one_or_none()
         
         if user and user.check_password(password):
             login_user(user)
@@ -189,6 +359,7 @@ def login():
 def logout():
     """Handle user logout"""
     username = current_user.username
+    invalidate_user_cache(current_user.id)
     logout_user()
     logger.info(f"User logged out: {username}")
     flash('You have been successfully logged out', 'success')
@@ -209,7 +380,7 @@ def register():
             flash('Passwords do not match', 'danger')
             return redirect(url_for('register'))
             
-        existing_user = User.query.filter_by(username=username).first()
+        existing_user = db.session.execute(select(User.id).filter_by(username=username)).scalar_one_or_none()
         if existing_user:
             flash('User with this username already exists', 'danger')
             return redirect(url_for('register'))
@@ -235,7 +406,11 @@ def register():
 @login_required
 def index():
     """Display user's articles"""
-    articles = Article.query.filter_by(user_id=current_user.id).order_by(Article.created_at.desc()).all()
+    # Only load the columns the listing renders
+    articles = Article.query.options(
+        load_only(Article.id, Article.topic, Article.title, Article.summary, Article.urls,
+                  Article.created_at, Article.status, Article.image_path)
+    ).filter_by(user_id=current_user.id).order_by(Article.created_at.desc()).all()
     return render_template('index.html', articles=articles)
 
 def escape_html_for_status(text):
@@ -244,109 +419,190 @@ def escape_html_for_status(text):
     """
     return html.escape(text) if text else ""
 
-def safe_json_loads(json_str):
+def safe_json_loads(json_str, already_clean=False):
     """
     Safe JSON parser with additional string preprocessing.
+    
+    Args:
+        json_str: String to parse
+        already_clean: Set if control characters and BOM were already removed
     """
     if not json_str:
         return None
+    
+    if not already_clean:
+        # Remove invisible characters, control sequences and byte order markers
+        json_str = json_str.translate(_CTRL_TABLE).replace('\ufeff', '')
+    
+    # Fast path: well-formed JSON needs no preprocessing
+    try:
+        return orjson.loads(json_str)
+    except orjson.JSONDecodeError:
+        pass
         
     # Handle special characters and formatting issues
+    processed_str = json_str
+    
     # 1. Replace unescaped backslashes
-    processed_str = re.sub(r'([^\\])\\([^\\"/bfnrtu])', r'\1\\\\\2', processed_str)
+    processed_str = _RE_BACKSLASH.sub(r'\1\\\\\2', processed_str)
     
     # 2. Replace unescaped quotes inside strings
-    processed_str = re.sub(r'([^\\])"([^"]*[^\\])"([^:,\s\}\]])', r'\1"\2\\"\3', processed_str)
+    processed_str = _RE_INNER_QUOTE.sub(r'\1"\2\\"\3', processed_str)
     
     # 3. Use existing logic for processing the rest of the string
-    processed_str = re.sub(r'(\s)(\$\d+)([MBK])(\s)', r'\1"\2\3"\4', processed_str)
-    
-    # 4. Remove invisible characters and control sequences
-    processed_str = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', processed_str)
-    
-    # 5. Remove BOM and other byte order markers
-    processed_str = processed_str.replace('\ufeff', '')
+    processed_str = _RE_MONEY.sub(r'\1"\2\3"\4', processed_str)
     
     try:
-        return json.loads(processed_str)
-    except json.JSONDecodeError as e:
+        return orjson.loads(processed_str)
+    except orjson.JSONDecodeError as e:
         try:
             # Try to recover from an improperly formatted JSON
             # 1. Add quotes around keys without quotes
-            fixed_str = re.sub(r'([{,])\s*([a-zA-Z0-9_]+)\s*:', r'\1"\2":', processed_str)
-            return json.loads(fixed_str)
-        except json.JSONDecodeError:
+            fixed_str = _RE_KEY_NOQUOTE.sub(r'\1"\2":', processed_str)
+            return orjson.loads(fixed_str)
+        except orjson.JSONDecodeError:
             try:
                 # 2. Try to fix unclosed quotes
                 fixed_str = processed_str
                 # Find unclosed keys and values
-                open_quotes = [m.start() for m in re.finditer(r'(?<![\\])"(?![\s]*[:,\]}])', fixed_str)]
+                open_quotes = [m.start() for m in _RE_OPEN_QUOTES.finditer(fixed_str)]
                 for pos in open_quotes:
                     # Add closing quote before comma or closing brace
-                    next_delimiter = re.search(r'[,\]}]', fixed_str[pos:])
+                    next_delimiter = _RE_DELIMITER.search(fixed_str, pos)
                     if next_delimiter:
-                        close_pos = pos + next_delimiter.start()
+                        close_pos = next_delimiter.start()
                         fixed_str = fixed_str[:close_pos] + '"' + fixed_str[close_pos:]
-                return json.loads(fixed_str)
-            except (json.JSONDecodeError, IndexError, AttributeError):
+                return orjson.loads(fixed_str)
+            except (orjson.JSONDecodeError, IndexError, AttributeError):
                 logger.warning(f"Error parsing JSON even after processing: {e}")
                 return None
 
-def find_value_in_nested_json(json_obj, key_to_find, visited=None):
+def _json_object_spans(text):
     """
-    Recursively searches for a key in JSON of any nesting.
-    Returns the first found value or None if the key is not found.
+    Returns (start, end) spans of every balanced {...} object in text,
+    largest first. Braces inside JSON strings are ignored.
+    """
+    spans = []
+    starts = []
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '{':
+            starts.append(i)
+        elif ch == '}':
+            if starts:
+                spans.append((starts.pop(), i + 1))
+        elif ch == '"' and starts:
+            # Quotes only open strings inside an object; prose around the JSON may be unbalanced
+            in_string = True
+
+    # Keep the outermost first-to-last brace span too: the safe parser can
+    # sometimes repair an object whose braces are not balanced
+    first, last = text.find('{'), text.rfind('}')
+    if first != -1 and last > first and (first, last + 1) not in spans:
+        spans.append((first, last + 1))
+
+    spans.sort(key=lambda span: span[1] - span[0], reverse=True)
+    return spans
+
+def _key_variations(key):
+    """
+    Returns the key together with its alternative spellings
+    (with prefixes article_, image_ and etc.).
+    """
+    return (
+        key,
+        f"article_{key}",
+        f"image_{key}",
+        f"social_media_{key}",
+        key.replace("_", ""),
+        key.replace("_", "-")
+    )
+
+# All fields we want to extract from the generated JSON
+EXPECTED_FIELDS = (
+    'content', 'title', 'summary', 'article_content', 'article_title', 'article_summary',
+    'image_url', 'image_path', 'image_relative_path', 'image_prompt',
+    'linkedin_post', 'twitter_post'
+)
+
+# Spelling variations of the expected fields, built once at import
+_FIELD_ALIASES = {field: _key_variations(field) for field in EXPECTED_FIELDS}
+
+def _index_json(json_obj):
+    """
+    Walks JSON of any nesting once and indexes all keys it contains.
     
     Args:
         json_obj: JSON object (dict, list, or primitive)
-        key_to_find: Key to search for
-        visited: Set of already visited objects to avoid cyclic references
     
     Returns:
-        Found value or None
+        Dictionary {key: [(node_order, value), ...]} where node_order is the
+        position of the containing object in depth-first order
     """
-    if visited is None:
-        visited = set()
-        
-    # Protection against cyclic references and primitive types
-    if not isinstance(json_obj, (dict, list)) or id(json_obj) in visited:
-        return None
+    index = defaultdict(list)
+    stack = [json_obj]
+    visited = set()
+    order = 0
     
-    visited.add(id(json_obj))
-    
-    if isinstance(json_obj, dict):
-        # Direct key search
-        if key_to_find in json_obj:
-            return json_obj[key_to_find]
+    while stack:
+        current = stack.pop()
         
-        # Search with key variations (with prefixes article_, image_ and etc.)
-        variations = [
-            key_to_find,
-            f"article_{key_to_find}",
-            f"image_{key_to_find}",
-            f"social_media_{key_to_find}",
-            key_to_find.replace("_", ""),
-            key_to_find.replace("_", "-")
-        ]
+        # Protection against cyclic references and primitive types
+        if not isinstance(current, (dict, list)) or id(current) in visited:
+            continue
+        visited.add(id(current))
         
-        for var in variations:
-            if var in json_obj:
-                return json_obj[var]
+        if isinstance(current, dict):
+            for key, value in current.items():
+                if value is not None:
+                    index[key].append((order, value))
+            children = current.values()
+        else:
+            children = current
+        order += 1
         
-        # Recursive search in values
-        for value in json_obj.values():
-            result = find_value_in_nested_json(value, key_to_find, visited)
-            if result is not None:
-                return result
+        # Push children in reverse so they are visited in document order
+        stack.extend(reversed([child for child in children if isinstance(child, (dict, list))]))
     
-    elif isinstance(json_obj, list):
-        # Recursive search in list items
-        for item in json_obj:
-            result = find_value_in_nested_json(item, key_to_find, visited)
-            if result is not None:
-                return result
+    return index
+
+def _lookup_json_index(index, key_to_find):
+    """
+    Finds the value for a key (or one of its variations) in a JSON index.
+    The outermost match wins, as in a depth-first search.
+    """
+    best = None
+    variations = _FIELD_ALIASES.get(key_to_find) or _key_variations(key_to_find)
+    for rank, variation in enumerate(variations):
+        entries = index.get(variation)
+        if entries:
+            order, value = entries[0]
+            if best is None or (order, rank) < (best[0], best[1]):
+                best = (order, rank, value)
+    return best[2] if best else None
+
+def find_value_in_nested_json(json_obj, key_to_find, visited=None):
+    """
+    Searches for a key in JSON of any nesting.
+    Returns the first found value or None if the key is not found.
     
-    return None
+    Args:
+        json_obj: JSON object (dict, list, or primitive)
+        key_to_find: Key to search for
+        visited: Unused, kept for backward compatibility
+    
+    Returns:
+        Found value or None
+    """
+    return _lookup_json_index(_index_json(json_obj), key_to_find)
 
 def extract_all_values_from_json(json_obj, keys_to_find):
     """
@@ -360,9 +616,11 @@ def extract_all_values_from_json(json_obj, keys_to_find):
     Returns:
         Dictionary of found values in format {key: value}
     """
+    # Index the tree once and answer every lookup from the index
+    index = _index_json(json_obj)
     result = {}
     for key in keys_to_find:
-        value = find_value_in_nested_json(json_obj, key)
+        value = _lookup_json_index(index, key)
         if value is not None:
             result[key] = value
     return result
@@ -380,116 +638,197 @@ def sanitize_json_data(article, data_dict):
             continue
             
         if isinstance(value, str):
-            # Unescape HTML entities
-            value = html.unescape(value)
-            
-            # Remove invisible control characters
-            value = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', value)
+            # Unescape HTML entities (except in plain-text fields) and
+            # remove invisible control characters
+            if key not in _PLAINTEXT_FIELDS:
+                value = html.unescape(value)
+            value = value.translate(_CTRL_TABLE)
             
             # Set attribute value if it exists in the model
-            if hasattr(article, key):
+            if key in _ARTICLE_ATTRS:
                 setattr(article, key, value)
                 logger.info(f"Updated article.{key} with value of length: {len(value) if value else 0}")
 
+class _LinkifyParser(HTMLParser):
+    """
+    Re-emits an HTML fragment in a single pass, wrapping bare URLs found in
+    text nodes into links. Text inside existing links, scripts and styles
+    is left as is.
+    """
+    RAW_TAGS = ('script', 'style')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._out = []
+        self._link_depth = 0
+        self._raw_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self._link_depth += 1
+        elif tag in self.RAW_TAGS:
+            self._raw_tag = tag
+        self._out.append(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        self._out.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._link_depth:
+            self._link_depth -= 1
+        elif tag == self._raw_tag:
+            self._raw_tag = None
+        self._out.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if self._raw_tag:
+            # Script/style content is passed through without entity conversion
+            self._out.append(data)
+        elif self._link_depth:
+            self._out.append(html.escape(data, quote=False))
+        else:
+            pos = 0
+            for match in _RE_BARE_URL.finditer(data):
+                url = match.group(0)
+                self._out.append(html.escape(data[pos:match.start()], quote=False))
+                self._out.append(f'<a href="{html.escape(url)}" target="_blank">{html.escape(url, quote=False)}</a>')
+                pos = match.end()
+            self._out.append(html.escape(data[pos:], quote=False))
+
+    def handle_comment(self, data):
+        self._out.append(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self._out.append(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self._out.append(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        self._out.append(f'<![{data}]>')
+
+    def result(self):
+        return ''.join(self._out)
+
+def _linkify(text):
+    """
+    Wraps bare http(s) URLs in HTML text into links.
+    """
+    if 'http' not in text:
+        return text
+    parser = _LinkifyParser()
+    parser.feed(text)
+    parser.close()
+    return parser.result()
+
+def _is_html(text):
+    """
+    Cheap check whether text is already HTML rather than Markdown.
+    """
+    return '<' in text and ('</' in text or '/>' in text or text.lstrip().startswith('<'))
+
 def generate_article_async(article_id):
     # Create application context
     with app.app_context():
         try:
-            article = Article.query.get(article_id)
-            if not article:
-                logger.error(f"Article with ID {article_id} not found")
+            # Claim the article with a conditional UPDATE so that only one worker
+            # generates it; a duplicate task finds it already processing and exits.
+            # A claim abandoned by a dead worker can be taken over once it is stale.
+            claimed = db.session.execute(
+                update(Article)
+                .where(
+                    Article.id == article_id,
+                    or_(Article.status == 'pending',
+                        and_(Article.status == 'processing', _processing_is_stale())),
+                )
+                .values(status='processing', processing_started_at=datetime.utcnow())
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                logger.warning("Article %s not found or already being processed, skipping", article_id)
                 return
+            logger.info("Article status updated to processing: %s", article_id)
 
-            article.status = 'processing'
-            db.session.commit()
-            logger.info(f"Article status updated to processing: {article_id}")
+            article = db.session.get(Article, article_id)
+            if not article:
+                logger.error("Article with ID %s not found", article_id)
+                return
 
             # Load URLs from JSON string
-            urls = json.loads(article.urls)
-            logger.info(f"Loaded URLs: {urls}")
+            urls = article.get_urls()
+            topic = article.topic
+            logger.info("Loaded URLs: %s", urls)
 
-            # Create and run the crew
-            result = generate_article(urls=urls, topic=article.topic, article_id=article.id)
-            logger.info(f"Result received for article ID {article_id} with length: {len(result)}")
+            # Create and run the crew; imported here so that web workers only
+            # load crewai and weave once they actually generate an article
+            from journalist_agent.main import generate_article
+            result = generate_article(urls=urls, topic=topic, article_id=article_id)
+            logger.info("Result received for article ID %s with length: %d", article_id, len(result))
 
             # Store the raw response
             article.raw_response = result
             
             # Clean the result for removal of control characters, but keep HTML and line breaks
-            clean_result = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', result)  # Remove control characters, keep line breaks, tabs, and HTML
+            clean_result = result.translate(_CTRL_TABLE).lstrip('\ufeff')  # Remove control characters, keep line breaks, tabs, and HTML
             
-            logger.info(f"Cleaned result for article ID {article_id}")
+            logger.info("Cleaned result for article ID %s", article_id)
             
             # Check if the result contains JSON
             contains_json = '{' in clean_result and '}' in clean_result
-            logger.info(f"Contains JSON: {contains_json}")
-            
-            # All fields we want to extract
-            expected_fields = [
-                'content', 'title', 'summary', 'article_content', 'article_title', 'article_summary',
-                'image_url', 'image_path', 'image_relative_path', 'image_prompt', 
-                'linkedin_post', 'twitter_post'
-            ]
+            logger.info("Contains JSON: %s", contains_json)
             
             # Try to parse the result as JSON
             result_json = None
+            extracted_data = None
             json_parsed = False
             
             try:
                 # First attempt: try to parse the entire result using safe parser
-                result_json = safe_json_loads(clean_result)
+                result_json = safe_json_loads(clean_result, already_clean=True)
                 if result_json:
                     logger.info("Successfully parsed result as JSON with safe parser")
                     json_parsed = True
                 else:
                     # Standard JSON parsing as fallback
-                    result_json = json.loads(clean_result)
+                    result_json = orjson.loads(clean_result)
                     logger.info("Successfully parsed result as JSON with standard parser")
                     json_parsed = True
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse result as JSON directly: {e}")
+            except orjson.JSONDecodeError as e:
+                logger.warning("Failed to parse result as JSON directly: %s", e)
                 json_parsed = False
                 result_json = None
                 
                 if contains_json:
-                    # Second attempt: try to extract JSON using regex
-                    logger.info("Attempting to extract JSON with regex")
-                    # Try to find a JSON object in the text
-                    json_patterns = [
-                        r'({[\s\S]*})',  # Most greedy pattern
-                        r'({[^{}]*})'     # Less greedy pattern for simple objects
-                    ]
-                    
-                    all_matches = []
-                    for pattern in json_patterns:
-                        matches = re.findall(pattern, clean_result)
-                        all_matches.extend(matches)
-                    
-                    # Sort matches by length (longest first) to prioritize complete JSON objects
-                    all_matches.sort(key=len, reverse=True)
-                    
-                    for match in all_matches:
+                    # Second attempt: scan for balanced JSON objects, largest first
+                    logger.info("Attempting to extract embedded JSON objects")
+                    for start, end in _json_object_spans(clean_result):
+                        match = clean_result[start:end]
                         # Try with safe parser first
-                        candidate_json = safe_json_loads(match)
+                        candidate_json = safe_json_loads(match, already_clean=True)
                         if not candidate_json:
                             # If safe parser fails, try standard parse with try/except
                             try:
-                                candidate_json = json.loads(match)
-                            except json.JSONDecodeError:
+                                candidate_json = orjson.loads(match)
+                            except orjson.JSONDecodeError:
                                 continue
                                 
                         # Check if JSON contains at least one of the expected keys
-                        if isinstance(candidate_json, dict) and any(find_value_in_nested_json(candidate_json, key) is not None for key in expected_fields):
+                        if not isinstance(candidate_json, dict):
+                            continue
+                        candidate_data = extract_all_values_from_json(candidate_json, EXPECTED_FIELDS)
+                        if candidate_data:
                             result_json = candidate_json
+                            extracted_data = candidate_data
                             json_parsed = True
-                            logger.info(f"Successfully extracted and parsed JSON")
+                            logger.info("Successfully extracted and parsed JSON")
                             break
             
             # Extract and update article data
             if json_parsed and result_json:
                 # Extract all relevant fields from the JSON using our universal function
-                extracted_data = extract_all_values_from_json(result_json, expected_fields)
-                logger.info(f"Found {len(extracted_data)} fields in JSON: {list(extracted_data.keys())}")
+                if extracted_data is None:
+                    extracted_data = extract_all_values_from_json(result_json, EXPECTED_FIELDS)
+                logger.info("Found %d fields in JSON: %s", len(extracted_data), list(extracted_data))
                 
                 # Map extracted fields to model fields
                 field_mapping = {
@@ -511,31 +850,20 @@ def generate_article_async(article_id):
                 # If content was not found in JSON, use raw_result
                 if 'content' not in normalized_data and 'article_content' not in normalized_data:
                     article.content = clean_result
-                    logger.info(f"Content not found in JSON, using cleaned raw result")
+                    logger.info("Content not found in JSON, using cleaned raw result")
             else:
                 # If JSON parsing failed, use the raw result as content
                 logger.warning("No valid JSON found. Using raw result as content.")
                 article.content = clean_result
                 
                 # In case of JSON failure, try to extract key data through regular expressions
-                regex_patterns = {
-                    'title': r'"(?:article_)?title":\s*"([^"]+(?:\\.[^"]+)*)"',
-                    'summary': r'"(?:article_)?summary":\s*"([^"]+(?:\\.[^"]+)*)"',
-                    'linkedin_post': r'"linkedin_post":\s*"([^"]+(?:\\.[^"]+)*)"',
-                    'twitter_post': r'"twitter_post":\s*"([^"]+(?:\\.[^"]+)*)"',
-                    'image_path': r'"image_path":\s*"([^"]+)"',
-                    'image_relative_path': r'"image_relative_path":\s*"([^"]+)"',
-                    'image_prompt': r'"image_prompt":\s*"([^"]+(?:\\.[^"]+)*)"',
-                    'image_url': r'"image_url":\s*"([^"]+)"'
-                }
-                
                 regex_data = {}
-                for field, pattern in regex_patterns.items():
-                    match = re.search(pattern, article.raw_response)
+                for field, pattern in _REGEX_FIELD_PATTERNS.items():
+                    match = pattern.search(clean_result)
                     if match:
                         value = match.group(1).replace('\\"', '"').replace('\\\\', '\\')
                         regex_data[field] = value
-                        logger.info(f"Extracted {field} using regex")
+                        logger.info("Extracted %s using regex", field)
                 
                 # Apply extracted data
                 sanitize_json_data(article, regex_data)
@@ -543,68 +871,70 @@ def generate_article_async(article_id):
                 # Special handling for image_relative_path
                 if 'image_relative_path' in regex_data and not article.image_path:
                     article.image_path = regex_data['image_relative_path']
-                    logger.info(f"Set image_path from image_relative_path: {article.image_path}")
+                    logger.info("Set image_path from image_relative_path: %s", article.image_path)
             
             # Final check and processing
             # 1. Ensure article has a title
             if not article.title and article.topic:
                 article.title = article.topic.capitalize()
-                logger.info(f"Used topic as title: {article.title}")
+                logger.info("Used topic as title: %s", article.title)
             
             # 2. Check for image URLs
             if article.image_path and not article.image_path.startswith('images/'):
                 # Possible full path - extract only relative part
-                match = re.search(r'(?:images|static)/.*?$', article.image_path)
+                match = _RE_IMG_PATH.search(article.image_path)
                 if match:
                     article.image_path = match.group(0)
-                    logger.info(f"Fixed image path to relative: {article.image_path}")
+                    logger.info("Fixed image path to relative: %s", article.image_path)
             
             # 3. Fix URLs in content
             if article.content:
                 # Replace potential broken URLs in text
-                article.content = re.sub(r'(href|src)=([\'"])((?!https?://)[^\'"]+)([\'"])', 
-                                        r'\1=\2https://\3\4', article.content)
-                
-                # Convert text URLs to HTML links
-                article.content = re.sub(r'(?<![\'"=])(https?://[^\s<>"\']+)', r'<a href="\1" target="_blank">\1</a>', article.content)
+                article.content = _RE_HREF_SRC_FIX.sub(r'\1=\2https://\3\4', article.content)
             
             # Convert text URLs to links in social media posts
             if article.linkedin_post:
-                article.linkedin_post = convert_markdown_to_html(article.linkedin_post)
+                if not _is_html(article.linkedin_post):
+                    article.linkedin_post = convert_markdown_to_html(article.linkedin_post)
                 # Convert simple URLs to HTML links (not affected by Markdown)
-                article.linkedin_post = re.sub(r'(?<![\'"=])((?:https?://)[^\s<>"\']+)(?![^<]*>)', r'<a href="\1" target="_blank">\1</a>', article.linkedin_post)
+                article.linkedin_post = _linkify(article.linkedin_post)
                 
             if article.twitter_post:
-                article.twitter_post = convert_markdown_to_html(article.twitter_post)
+                if not _is_html(article.twitter_post):
+                    article.twitter_post = convert_markdown_to_html(article.twitter_post)
                 # Convert simple URLs to HTML links (not affected by Markdown)
-                article.twitter_post = re.sub(r'(?<![\'"=])((?:https?://)[^\s<>"\']+)(?![^<]*>)', r'<a href="\1" target="_blank">\1</a>', article.twitter_post)
+                article.twitter_post = _linkify(article.twitter_post)
             
             if article.content:
-                article.content = convert_markdown_to_html(article.content)
+                if not _is_html(article.content):
+                    article.content = convert_markdown_to_html(article.content)
                 # Convert simple URLs to HTML links (not affected by Markdown)
-                article.content = re.sub(r'(?<![\'"=])((?:https?://)[^\s<>"\']+)(?![^<]*>)', r'<a href="\1" target="_blank">\1</a>', article.content)
+                article.content = _linkify(article.content)
             
             # Final data saving
             article.status = 'completed'
             db.session.commit()
-            logger.info(f"Article generation completed successfully: {article_id}")
+            logger.info("Article generation completed successfully: %s", article_id)
             return "Article generated successfully"
             
         except Exception as e:
-            logger.error(f"Error generating article: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error generating article %s", article_id)
             
-            # Update article status to error
+            # Discard partial changes and update article status to error
             try:
-                article = Article.query.get(article_id)
-                if article:
-                    article.status = 'error'
-                    db.session.commit()
-                    logger.info(f"Article status updated to error: {article_id}")
+                db.session.rollback()
+                db.session.execute(
+                    update(Article).where(Article.id == article_id).values(status='error')
+                )
+                db.session.commit()
+                logger.info("Article status updated to error: %s", article_id)
             except Exception as update_error:
-                logger.error(f"Error updating article status: {str(update_error)}")
+                logger.error("Error updating article status: %s", update_error)
                 
             return f"Error: {str(e)}"
+        finally:
+            # Return the connection to the pool as soon as the task is done
+            db.session.remove()
 
 @app.route('/create', methods=['GET', 'POST'])
 @login_required
@@ -638,14 +968,9 @@ def create():
             article_id = article.id
             logger.info(f"Article created in database with ID: {article_id}, status: pending")
             
-            # Start asynchronous article generation in a separate thread
-            thread = threading.Thread(
-                target=generate_article_async,
-                args=(article_id,)
-            )
-            thread.daemon = True  # Thread will terminate when the main thread terminates
-            thread.start()
-            logger.info(f"Started async article generation thread for ID: {article_id}")
+            # Queue asynchronous article generation on the shared worker pool
+            EXECUTOR.submit(generate_article_async, article_id)
+            logger.info(f"Queued async article generation for ID: {article_id}")
             
             flash('Article is being generated! You can close this window and come back later.', 'info')
             return redirect(url_for('view_article', article_id=article_id))
@@ -706,15 +1031,23 @@ def regenerate_article(article_id):
             flash('Article not found or you do not have permission to regenerate it.', 'danger')
             return redirect(url_for('index'))
         
-        # Reset article status to pending
-        article.status = 'pending'
+        # Reset article status to pending, unless a worker is generating it
+        # right now; resetting then would let a second worker claim it too.
+        # A stale 'processing' claim (the worker died) can be reset.
+        reset = db.session.execute(
+            update(Article)
+            .where(Article.id == article_id,
+                   or_(Article.status != 'processing', _processing_is_stale()))
+            .values(status='pending')
+        ).rowcount
         db.session.commit()
+        if not reset:
+            flash('Article is already generating.', 'info')
+            return redirect(url_for('view_article', article_id=article_id))
         flash('Article regeneration started.', 'info')
         
         # Start async regeneration
-        thread = threading.Thread(target=generate_article_async, args=(article_id,))
-        thread.daemon = True
-        thread.start()
+        EXECUTOR.submit(generate_article_async, article_id)
         
         return redirect(url_for('view_article', article_id=article_id))
     except Exception as e:
@@ -734,6 +1067,15 @@ def internal_server_error(e):
     logger.error(f"500 error: {str(e)}")
     return render_template('error.html', error_code=500, message='Internal server error'), 500
 
+def _markdown_label(match):
+    """Replacement for _RE_MD_LABEL: Author: -> <strong>Author:</strong>"""
+    return f'<strong>{match.group(1) or "Source URL"}:</strong> '
+
+def _markdown_header(match):
+    """Replacement for _RE_MD_HEADER: <p>## Header</p> -> <h2>Header</h2>"""
+    level = len(match.group(1))
+    return f'<h{level}>{match.group(2)}</h{level}>'
+
 def convert_markdown_to_html(text):
     """
     Converts basic Markdown formatting to HTML.
@@ -747,36 +1089,37 @@ def convert_markdown_to_html(text):
     if not text:
         return text
     
+    # Each pass below is skipped when its marker does not occur in the text;
+    # the substring checks are much cheaper than a regex scan
+    
     # Convert Markdown-style links [text](link) - do this before paragraph conversion
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank">\1</a>', text)
+    if '](' in text:
+        text = _RE_MD_LINK.sub(r'<a href="\2" target="_blank">\1</a>', text)
     
     # Convert formatting and author information
-    text = re.sub(r'Author:\s+([^\n]+)', r'<strong>Author:</strong> \1', text)
-    text = re.sub(r'Published Date:\s+([^\n]+)', r'<strong>Published Date:</strong> \1', text)
-    text = re.sub(r'Source URL:\s+', r'<strong>Source URL:</strong> ', text)
+    if 'Author:' in text or 'Published Date:' in text or 'Source URL:' in text:
+        text = _RE_MD_LABEL.sub(_markdown_label, text)
         
     # Convert \n\n to paragraph separators <p>
-    text = re.sub(r'\n\n+', '</p>\n\n<p>', text)
+    if '\n\n' in text:
+        text = _RE_MD_PARA.sub('</p>\n\n<p>', text)
     
-    # Wrap all text in <p> if not already
-    if not text.startswith('<p>'):
-        text = '<p>' + text
-    if not text.endswith('</p>'):
-        text = text + '</p>'
+    # Wrap all text in <p> if not already (in a single concatenation)
+    prefix = '' if text.startswith('<p>') else '<p>'
+    suffix = '' if text.endswith('</p>') else '</p>'
+    if prefix or suffix:
+        text = f'{prefix}{text}{suffix}'
     
     # Headers (## Header -> <h2>Header</h2>)
-    text = re.sub(r'<p>#{6}\s+(.+?)</p>', r'<h6>\1</h6>', text)
-    text = re.sub(r'<p>#{5}\s+(.+?)</p>', r'<h5>\1</h5>', text)
-    text = re.sub(r'<p>#{4}\s+(.+?)</p>', r'<h4>\1</h4>', text)
-    text = re.sub(r'<p>#{3}\s+(.+?)</p>', r'<h3>\1</h3>', text)
-    text = re.sub(r'<p>#{2}\s+(.+?)</p>', r'<h2>\1</h2>', text)
-    text = re.sub(r'<p>#\s+(.+?)</p>', r'<h1>\1</h1>', text)
-    
-    # Bold text (**text** -> <strong>text</strong>)
-    text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
-    
-    # Italic text (*text* -> <em>text</em>)
-    text = re.sub(r'\*([^\*]+?)\*', r'<em>\1</em>', text)
+    if '#' in text:
+        text = _RE_MD_HEADER.sub(_markdown_header, text)
+    
+    if '*' in text:
+        # Bold text (**text** -> <strong>text</strong>)
+        text = _RE_MD_BOLD.sub(r'<strong>\1</strong>', text)
+        
+        # Italic text (*text* -> <em>text</em>)
+        text = _RE_MD_ITALIC.sub(r'<em>\1</em>', text)
     
     # Convert line breaks to <br>
     text = text.replace('\n', '<br>')
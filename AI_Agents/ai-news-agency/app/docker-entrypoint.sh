@@ -35,4 +35,5 @@ echo -e "${YELLOW}Starting application with Gunicorn...${NC}"
 echo -e "${GREEN}Application will be available at: http://0.0.0.0:5000${NC}"
 
 # Start Gunicorn with specified parameters
-exec gunicorn --bind 0.0.0.0:5000 --workers 2 --threads 4 --timeout 120 app:app
+# gthread workers share one article-generation pool (GEN_WORKERS) per process
+exec gunicorn --bind 0.0.0.0:5000 --worker-class gthread --workers 2 --threads 4 --timeout 120 app:app
@@ -7,6 +7,7 @@ from .tools.image_downloader import ImageDownloader
 from .tools.json_formatter import JSONFormatter
 import os
 import logging
+import threading
 from dotenv import load_dotenv
 from crewai_tools import DallETool
 import weave  # Added import for weave
@@ -35,8 +36,19 @@ if not wandb_entity:
 else:
     logger.info(f"Using WANDB_ENTITY: {wandb_entity}")
 
-logger.info(f"Initializing W&B Weave with project name: {project_name}")
-weave.init(project_name=project_name)
+_WEAVE_INITIALIZED = False
+_WEAVE_LOCK = threading.Lock()
+
+def _ensure_weave():
+    """Initialize weave tracing once, when the first crew is created"""
+    global _WEAVE_INITIALIZED
+    if _WEAVE_INITIALIZED:
+        return
+    with _WEAVE_LOCK:
+        if not _WEAVE_INITIALIZED:
+            logger.info(f"Initializing W&B Weave with project name: {project_name}")
+            weave.init(project_name=project_name)
+            _WEAVE_INITIALIZED = True
 
 # Get LLM model from environment variable
 MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
@@ -47,6 +59,23 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 if not OPENAI_API_KEY:
     logger.warning("OPENAI_API_KEY not found in environment variables")
 
+# Create a common LLM instance once; it only holds configuration and is
+# shared by all agents of every JournalistAgent
+_LLM_CONFIG = {"model": MODEL_NAME}
+
+# Add API configuration if using a non-standard API key
+# (sk-proj-* is typically used with non-standard providers)
+if OPENAI_API_KEY.startswith("sk-proj-"):
+    logger.info("Detected provider-specific API key, configuring accordingly")
+    # Configuration for alternative API providers
+    api_base = os.getenv("OPENAI_API_BASE", "")
+    if api_base:
+        _LLM_CONFIG["base_url"] = api_base
+        logger.info(f"Using custom API base URL: {api_base}")
+
+_DEFAULT_LLM = LLM(**_LLM_CONFIG)
+logger.info(f"LLM configured with model: {MODEL_NAME}")
+
 # Decorate your guardrail function with `@weave.op()`
 @weave.op(name="guardrail-validate_social_media_content")
 def validate_social_media_content(result: TaskOutput) -> Tuple[bool, Any]:
@@ -55,10 +84,12 @@ def validate_social_media_content(result: TaskOutput) -> Tuple[bool, Any]:
 
     """Validate social media content meets requirements."""
     try:
-        # Check word count
-        word_count = len(result_text.split())
+        # Check word count; splitting stops after 50 words, which is enough
+        # to get the exact count of valid content
+        word_count = len(result_text.split(maxsplit=50))
         
         if word_count > 50:
+            word_count = len(result_text.split())
             logger.warning(f"Social media content exceeds 50 words (found {word_count} words)")
             # Return False but with the original text as the second element
             # This might allow CrewAI to proceed with the original content
@@ -84,25 +115,14 @@ class JournalistAgent():
             topic: Topic of the article to generate
             article_id: ID of the article in the database (needed for image storage)
         """
+        _ensure_weave()
+        
         self.urls = urls or []
         self.topic = topic or ""
         self.article_id = article_id
         
-        # Create a common LLM instance for all agents
-        llm_config = {"model": MODEL_NAME}
-        
-        # Add API configuration if using a non-standard API key
-        # (sk-proj-* is typically used with non-standard providers)
-        if OPENAI_API_KEY.startswith("sk-proj-"):
-            logger.info("Detected provider-specific API key, configuring accordingly")
-            # Configuration for alternative API providers
-            api_base = os.getenv("OPENAI_API_BASE", "")
-            if api_base:
-                llm_config["base_url"] = api_base
-                logger.info(f"Using custom API base URL: {api_base}")
-        
-        self.llm = LLM(**llm_config)
-        logger.info(f"LLM configured with model: {MODEL_NAME}")
+        # Common LLM instance for all agents
+        self.llm = _DEFAULT_LLM
         
         # Variables for formatting in YAML
         self.format_args = {
@@ -110,6 +130,22 @@ class JournalistAgent():
             "topic": self.topic,
             "article_id": self.article_id
         }
+        # Task configs with formatted descriptions, built on first use
+        # (the YAML configs are loaded by CrewBase after __init__)
+        self._task_configs = None
+        
+        # Crew built by crew(), reused by later calls (replay, train, test)
+        self._crew = None
+    
+    def _task_config(self, name: str) -> Dict[str, Any]:
+        """Get a task config with its description formatted for the current format args"""
+        if self._task_configs is None:
+            self._task_configs = {}
+            for task_name, task_config in self.tasks_config.items():
+                if "description" in task_config:
+                    task_config = {**task_config, "description": task_config["description"].format(**self.format_args)}
+                self._task_configs[task_name] = task_config
+        return self._task_configs[name]
     
     @before_kickoff
     def prepare_inputs(self, inputs: dict):
@@ -130,6 +166,7 @@ class JournalistAgent():
             "topic": self.topic,
             "article_id": self.article_id
         }
+        self._task_configs = None
         
         # Make sure we have at least some default values
         if not self.urls:
@@ -236,11 +273,8 @@ class JournalistAgent():
     @task
     def url_research_task(self) -> Task:
         """URL research task"""
-        task_config = dict(self.tasks_config["url_research_task"])
-        task_config["description"] = task_config["description"].format(**self.format_args)
-            
         return Task(
-            config=task_config,
+            config=self._task_config("url_research_task"),
             agent=self.url_researcher()
         )
         
@@ -250,12 +284,8 @@ class JournalistAgent():
         # Get reference to URL research task for context
         url_task = self.url_research_task()
         
-        # Format the task description
-        task_config = dict(self.tasks_config["content_aggregation_task"])
-        task_config["description"] = task_config["description"].format(**self.format_args)
-            
         return Task(
-            config=task_config,
+            config=self._task_config("content_aggregation_task"),
             agent=self.content_aggregator(),
             context=[url_task]
         )
@@ -267,12 +297,8 @@ class JournalistAgent():
         url_task = self.url_research_task()
         content_task = self.content_aggregation_task()
         
-        # Format the task description for writing
-        task_config = dict(self.tasks_config["writing_task"])
-        task_config["description"] = task_config["description"].format(**self.format_args)
-            
         return Task(
-            config=task_config,
+            config=self._task_config("writing_task"),
             agent=self.writer(),
             context=[content_task, url_task]
         )
@@ -285,11 +311,8 @@ class JournalistAgent():
         writing_task = self.writing_task()
         content_task = self.content_aggregation_task()
         
-        # Format the task description for editing
-        task_config = dict(self.tasks_config["editing_task"])
-            
         return Task(
-            config=task_config,
+            config=self._task_config("editing_task"),
             agent=self.editor(),
             context=[writing_task, url_task, content_task]
         )
@@ -300,14 +323,11 @@ class JournalistAgent():
         # Get reference to editing task for context
         editing_task = self.editing_task()
         
-        # Format the task description for image generation
-        task_config = dict(self.tasks_config["image_generation_task"])
-        task_config["description"] = task_config["description"].format(**self.format_args)
-            
         return Task(
-            config=task_config,
+            config=self._task_config("image_generation_task"),
             agent=self.image_generator(),
-            context=[editing_task]
+            context=[editing_task],
+            async_execution=True
         )
         
     @task
@@ -316,14 +336,11 @@ class JournalistAgent():
         # Get reference to editing task for context
         editing_task = self.editing_task()
         
-        # Format the task description for social media content
-        task_config = dict(self.tasks_config["social_media_task"])
-        task_config["description"] = task_config["description"].format(**self.format_args)
-            
         return Task(
-            config=task_config,
+            config=self._task_config("social_media_task"),
             agent=self.social_media_writer(),
-            context=[editing_task]
+            context=[editing_task],
+            async_execution=True
         )
         
     @task
@@ -334,12 +351,8 @@ class JournalistAgent():
         image_task = self.image_generation_task()
         social_task = self.social_media_task()
         
-        # Format the task description for collection
-        task_config = dict(self.tasks_config["collection_task"])
-        task_config["description"] = task_config["description"].format(**self.format_args)
-            
         return Task(
-            config=task_config,
+            config=self._task_config("collection_task"),
             agent=self.collector(),
             context=[editing_task, image_task, social_task]
         )
@@ -347,103 +360,46 @@ class JournalistAgent():
     @crew
     def crew(self):
         """
-        Define the crew with agents and tasks configuration
+        Define the crew with agents and tasks configuration.
+        
+        Tasks run in order, except image generation and social media posts:
+        both only depend on the edited article, so they run concurrently
+        (async_execution) and the collection task waits for both of them.
         """
-        # Check for parallel execution support
-        try:
-            # First part of the process - sequential execution up to article creation
-            sequential_part = Crew(
-                agents=[
-                    self.url_researcher(),
-                    self.content_aggregator(),
-                    self.writer(),
-                    self.editor()
-                ],
-                tasks=[
-                    self.url_research_task(),
-                    self.content_aggregation_task(), 
-                    self.writing_task(),
-                    self.editing_task()
-                ],
-                process=Process.sequential,
-                verbose=True
-            )
-            
-            # Second part of the process - sequential creation of image and social media posts
-            # Changed to sequential process instead of parallel for compatibility
-            parallel_part = Crew(
-                agents=[
-                    self.image_generator(),
-                    self.social_media_writer()
-                ],
-                tasks=[
-                    self.image_generation_task(),
-                    self.social_media_task()
-                ],
-                process=Process.sequential,  # Changed to sequential process
-                verbose=True
-            )
-            
-            # Third part - final assembly
-            final_part = Crew(
-                agents=[self.collector()],
-                tasks=[self.collection_task()],
-                process=Process.sequential,
-                verbose=True
-            )
-            
-            # Combined process that executes parts sequentially
-            crew = Crew(
-                crews=[sequential_part, parallel_part, final_part],
-                process=Process.sequential,
-                verbose=True,
-                memory=True,
-                embedder={
-                    "provider": "openai",
-                    "config": {
-                        "model": "text-embedding-3-small"
-                    }
-                }
-            )
-            
-            logger.info(f"Created crew with topic: {self.topic} and memory enabled")
-                
-            return crew
-            
-        except Exception as e:
-            logger.error(f"Error creating crew structure: {str(e)}")
-            
-            # Alternative configuration - all in one sequential Crew
-            logger.info("Falling back to simple sequential crew configuration")
-            
-            crew = Crew(
-                agents=[
-                    self.url_researcher(),
-                    self.content_aggregator(),
-                    self.writer(),
-                    self.editor(),
-                    self.image_generator(),
-                    self.social_media_writer(),
-                    self.collector()
-                ],
-                tasks=[
-                    self.url_research_task(),
-                    self.content_aggregation_task(), 
-                    self.writing_task(),
-                    self.editing_task(),
-                    self.image_generation_task(),
-                    self.social_media_task(),
-                    self.collection_task()
-                ],
-                process=Process.sequential,
-                verbose=True,
-                memory=True,
-                embedder={
-                    "provider": "openai",
-                    "config": {
-                        "model": "text-embedding-3-small"
-                    }
+        if self._crew is not None:
+            return self._crew
+        
+        crew = Crew(
+            agents=[
+                self.url_researcher(),
+                self.content_aggregator(),
+                self.writer(),
+                self.editor(),
+                self.image_generator(),
+                self.social_media_writer(),
+                self.collector()
+            ],
+            tasks=[
+                self.url_research_task(),
+                self.content_aggregation_task(), 
+                self.writing_task(),
+                self.editing_task(),
+                self.image_generation_task(),
+                self.social_media_task(),
+                self.collection_task()
+            ],
+            process=Process.sequential,
+            verbose=True,
+            memory=True,
+            embedder={
+                "provider": "openai",
+                "config": {
+                    "model": "text-embedding-3-small"
                 }
-            )
-            
-            return crew
+            }
+        )
+        
+        logger.info(f"Created crew with topic: {self.topic} and memory enabled")
+        
+        self._crew = crew
+        return crew
@@ -108,12 +108,11 @@ def generate_article(urls: List[str] = None, topic: str = None, article_id: int
             return "Error: No valid URLs provided for analysis"
             
         # Check each URL
-        valid_urls = []
-        for url in urls:
-            if url and isinstance(url, str) and (url.startswith('http://') or url.startswith('https://')):
-                valid_urls.append(url)
-            else:
-                logger.warning(f"Invalid URL format: {url}")
+        valid_urls = [url for url in urls if isinstance(url, str) and url.startswith(('http://', 'https://'))]
+        if len(valid_urls) != len(urls):
+            for url in urls:
+                if url not in valid_urls:
+                    logger.warning(f"Invalid URL format: {url}")
                 
         if not valid_urls:
             logger.error("No valid formatted URLs found in the input")
@@ -1,16 +1,78 @@
 import os
-import json
+import shutil
+import orjson
 import logging
 import requests
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Module logger; handlers and level are configured by the application
 logger = logging.getLogger("image_downloader")
 
+# Chunk size for streaming image downloads; DALL-E images are a few MB,
+# so large chunks keep the number of reads and writes small
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Root directory for article images: app/static/images
+IMAGES_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))),
+                           "static", "images")
+
+# Shared HTTP session so that downloads reuse pooled connections instead of
+# repeating DNS, TCP and TLS handshakes; transient errors are retried with
+# exponential backoff
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+# Images already downloaded in this process: (image_url, article_id) ->
+# (file_path, relative_path, filename). Lets agent retries and re-runs reuse
+# the saved file instead of fetching the same image again.
+_URL_CACHE: dict[tuple[str, int], tuple[str, str, str]] = {}
+
+def _create_unique_file(base_dir: str, base_filename: str):
+    """
+    Atomically creates a new file in base_dir (creating the directory if it
+    does not exist yet). If the name is already taken,
+    a timestamp suffix is added (and a counter if that is taken too).
+    
+    Returns:
+        Tuple of (binary file object, filename, full file path)
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    name, ext = os.path.splitext(base_filename)
+    timestamp = int(time.time())
+    filename = base_filename
+    attempt = 0
+    created_dir = False
+    while True:
+        file_path = os.path.join(base_dir, filename)
+        try:
+            fd = os.open(file_path, flags, 0o644)
+        except FileNotFoundError:
+            if created_dir:
+                # The directory exists now, so the path itself can't be created
+                raise
+            # Create directory if it doesn't exist
+            os.makedirs(base_dir, exist_ok=True)
+            logger.info("Image directory created: %s", base_dir)
+            created_dir = True
+            continue
+        except FileExistsError:
+            attempt += 1
+            suffix = str(timestamp) if attempt == 1 else f"{timestamp}_{attempt}"
+            new_filename = f"{name}_{suffix}{ext}"
+            logger.info("File with name %s already exists. Creating new file with name %s", filename, new_filename)
+            filename = new_filename
+            continue
+        return os.fdopen(fd, 'wb', buffering=DOWNLOAD_CHUNK_SIZE), filename, file_path
+
 class ImageDownloaderInput(BaseModel):
     """
     Input schema for the image downloader tool.
@@ -46,62 +108,62 @@ class ImageDownloader(BaseTool):
         Returns:
             JSON string with download results, including the local path to the saved file
         """
+        cached = _URL_CACHE.get((image_url, article_id))
+        if cached and os.path.exists(cached[0]):
+            file_path, relative_path, filename = cached
+            logger.info("Image already downloaded, reusing: %s", file_path)
+            return orjson.dumps({
+                "success": True,
+                "local_path": file_path,
+                "relative_path": relative_path,
+                "filename": filename
+            }).decode()
+
         try:
-            # Base directory for storing images
-            base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))), 
-                                    "static", "images", str(article_id))
+            # Base directory for storing images (created on first write)
+            base_dir = os.path.join(IMAGES_ROOT, str(article_id))
             
-            # Create directory if it doesn't exist
-            os.makedirs(base_dir, exist_ok=True)
-            logger.info(f"Image directory created: {base_dir}")
-            
-            # Determine filename
-            if filename:
+            # Determine filename; a custom name may not point outside the
+            # article's directory, so any path components are dropped
+            if filename and os.path.basename(filename):
                 # If custom filename is provided
-                base_filename = filename
+                base_filename = os.path.basename(filename)
                 if not (base_filename.endswith('.jpg') or base_filename.endswith('.png') or base_filename.endswith('.jpeg')):
                     base_filename += '.jpg'  # Add extension if not specified
             else:
                 # Use article ID and timestamp
                 base_filename = f"article_{article_id}_image.jpg"
             
-            # Generate unique filename if file already exists
-            file_path = os.path.join(base_dir, base_filename)
-            if os.path.exists(file_path):
-                # Filename already exists, add timestamp
-                name_parts = os.path.splitext(base_filename)
-                timestamp = int(time.time())
-                new_filename = f"{name_parts[0]}_{timestamp}{name_parts[1]}"
-                file_path = os.path.join(base_dir, new_filename)
-                logger.info(f"File with name {base_filename} already exists. Creating new file with name {new_filename}")
-                filename = new_filename
-            else:
-                filename = base_filename
-            
-            # Download image
-            response = requests.get(image_url, stream=True)
-            response.raise_for_status()  # Check request success
-            
-            # Save image to disk
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Download image; the with block returns the pooled connection
+            # even when one of the steps below fails
+            with _session.get(image_url, stream=True) as response:
+                response.raise_for_status()  # Check request success
+                
+                # Create the file under a unique name only once the download has started
+                f, filename, file_path = _create_unique_file(base_dir, base_filename)
+                
+                # Save image to disk, copying straight from the response stream
+                # (decode_content keeps gzip/deflate transfer encodings handled)
+                response.raw.decode_content = True
+                with f:
+                    shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
             
             # Calculate relative path for web application use
             relative_path = os.path.join("images", str(article_id), filename)
             
-            logger.info(f"Image successfully downloaded and saved: {file_path}")
+            logger.info("Image successfully downloaded and saved: %s", file_path)
+            _URL_CACHE[(image_url, article_id)] = (file_path, relative_path, filename)
             
             # Return result
-            return json.dumps({
+            return orjson.dumps({
                 "success": True,
                 "local_path": file_path,
                 "relative_path": relative_path,
                 "filename": filename
-            })
+            }).decode()
         except Exception as e:
-            logger.error(f"Error downloading image: {str(e)}")
-            return json.dumps({
+            logger.error("Error downloading image: %s", e)
+            return orjson.dumps({
                 "success": False,
                 "error": str(e)
-            }) 
\ No newline at end of file
+            }).decode() 
\ No newline at end of file
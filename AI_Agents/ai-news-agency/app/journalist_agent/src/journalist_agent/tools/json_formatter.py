@@ -1,13 +1,20 @@
-import json
+import orjson
 import logging
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Module logger; handlers and level are configured by the application
 logger = logging.getLogger("json_formatter")
 
+# Fields checked for empty values before serialization
+_REQUIRED_SCALARS = ("article_title", "article_content", "article_summary")
+_REQUIRED_SECTIONS = (
+    ("image_info", ("original_url", "local_path", "relative_path", "prompt")),
+    ("social_media", ("linkedin", "twitter")),
+)
+
 class ArticleDataInput(BaseModel):
     """
     Input data schema for formatting an article in JSON.
@@ -33,6 +40,61 @@ class ArticleDataInput(BaseModel):
     linkedin_post: str = Field(..., description="Full LinkedIn post text")
     twitter_post: str = Field(..., description="Full Twitter/X post text")
 
+@lru_cache(maxsize=32)
+def _format_article_json(
+    article_title: str,
+    article_content: str,
+    article_summary: str,
+    image_url: str,
+    image_local_path: str,
+    image_relative_path: str,
+    image_prompt: str,
+    linkedin_post: str,
+    twitter_post: str
+) -> str:
+    """
+    Builds, validates and serializes the article JSON.
+    Cached by the field values, so agent retries with the same data reuse the result.
+    """
+    # Create structured JSON object
+    article_data = {
+        "article_title": article_title,
+        "article_content": article_content,
+        "article_summary": article_summary,
+        "image_info": {
+            "original_url": image_url,
+            "local_path": image_local_path,
+            "relative_path": image_relative_path,
+            "prompt": image_prompt
+        },
+        "social_media": {
+            "linkedin": linkedin_post,
+            "twitter": twitter_post
+        }
+    }
+
+    # Validation only produces warnings, so skip it when they would be dropped
+    if logger.isEnabledFor(logging.WARNING):
+        # Check summary length
+        if len(article_summary) > 160:
+            logger.warning("Article has a summary that is too long: %d characters (recommended up to 160)", len(article_summary))
+
+        # Check all required fields
+        for key in _REQUIRED_SCALARS:
+            if not article_data.get(key):
+                logger.warning("Field %s is empty or missing", key)
+
+        for section, keys in _REQUIRED_SECTIONS:
+            values = article_data[section]
+            for key in keys:
+                if not values.get(key):
+                    logger.warning("Field %s.%s is empty or missing", section, key)
+
+    # Convert to JSON string
+    formatted_json = orjson.dumps(article_data).decode()
+
+    return formatted_json
+
 class JSONFormatter(BaseTool):
     """
     Tool for formatting article data into a standardized JSON structure.
@@ -81,50 +143,20 @@ class JSONFormatter(BaseTool):
             String in JSON format with all data organized in the expected structure
         """
         try:
-            # Create structured JSON object
-            article_data = {
-                "article_title": article_title,
-                "article_content": article_content,
-                "article_summary": article_summary,
-                "image_info": {
-                    "original_url": image_url,
-                    "local_path": image_local_path,
-                    "relative_path": image_relative_path,
-                    "prompt": image_prompt
-                },
-                "social_media": {
-                    "linkedin": linkedin_post,
-                    "twitter": twitter_post
-                }
-            }
-            
-            # Check summary length
-            if len(article_summary) > 160:
-                logger.warning(f"Article has a summary that is too long: {len(article_summary)} characters (recommended up to 160)")
-            
-            # Check all required fields
-            for key in ["article_title", "article_content", "article_summary"]:
-                if not article_data[key]:
-                    logger.warning(f"Field {key} is empty or missing")
-            
-            for section in ["image_info", "social_media"]:
-                if not article_data[section] or not isinstance(article_data[section], dict):
-                    logger.warning(f"Section {section} is missing or is not a dictionary")
-                else:
-                    for key in article_data[section]:
-                        if not article_data[section][key]:
-                            logger.warning(f"Field {section}.{key} is empty or missing")
-            
-            # Convert to JSON string
-            formatted_json = json.dumps(article_data, ensure_ascii=False, indent=None)
+            # Build the JSON string (cached for repeated calls with the same data)
+            formatted_json = _format_article_json(
+                article_title, article_content, article_summary,
+                image_url, image_local_path, image_relative_path, image_prompt,
+                linkedin_post, twitter_post
+            )
             logger.info("JSON successfully formed")
             
             return formatted_json
             
         except Exception as e:
-            logger.error(f"Error formatting JSON: {str(e)}")
+            logger.error("Error formatting JSON: %s", e)
             error_response = {
                 "error": f"Error formatting JSON: {str(e)}",
                 "success": False
             }
-            return json.dumps(error_response) 
\ No newline at end of file
+            return orjson.dumps(error_response).decode() 
\ No newline at end of file
@@ -1,21 +1,30 @@
 import os
-import json
+import orjson
 import logging
 import re
+import time
+import random
+import requests
 from typing import List, Union, Optional, Dict, Any
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from firecrawl import FirecrawlApp as FireCrawlClient
 
-# Configure basic logging for the module
-logging.basicConfig(level=logging.INFO)
+# Module logger; handlers and level are configured by the application
 logger = logging.getLogger("url_analyzer")
 
 # Get FireCrawl API key from environment variables
 # This key is required for accessing the FireCrawl service
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
 
+# Pattern for finding URLs in free text (task context)
+_URL_RE = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
+
+# Maximum number of URLs extracted concurrently, to stay within FireCrawl rate limits
+FIRECRAWL_MAX_WORKERS = int(os.getenv("FIRECRAWL_MAX_WORKERS", "4"))
+
 # Initialize FireCrawl client with API key
 # The client will be used for all URL content extraction operations
 firecrawl_client = None
@@ -24,7 +33,25 @@ if FIRECRAWL_API_KEY:
         firecrawl_client = FireCrawlClient(api_key=FIRECRAWL_API_KEY)
         logger.info("FireCrawl client initialized successfully")
     except Exception as e:
-        logger.error(f"Error initializing FireCrawl client: {str(e)}")
+        logger.error("Error initializing FireCrawl client: %s", e)
+
+def _retry(fn, *, tries=4, base=1.0):
+    """
+    Calls fn() and retries it on transient errors with exponential backoff and jitter.
+    Client errors (4xx other than 408 and 429) are raised immediately.
+    """
+    for attempt in range(tries):
+        try:
+            return fn()
+        except (requests.RequestException, ValueError) as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            if status and 400 <= status < 500 and status not in (408, 429):
+                raise
+            if attempt == tries - 1:
+                raise
+            delay = random.uniform(0.9, 1.1) * base * 2 ** attempt
+            logger.warning("Transient error: %s. Retrying in %.1fs", e, delay)
+            time.sleep(delay)
 
 class NewsContent(BaseModel):
     """
@@ -42,6 +69,24 @@ class NewsContent(BaseModel):
     author: Optional[str] = Field(None, description="Author of the article if available")
     published_date: Optional[str] = Field(None, description="Publication date if available")
 
+# Extraction parameters are the same for every URL; the schema is
+# generated once since model_json_schema() rebuilds it on every call
+_EXTRACT_PROMPT = """
+    Extract the following information from the news article EXACTLY as it appears on the page, but remove any markdown formatting, HTML tags, or special characters:
+    1. The main title of the article (as plain text, no formatting)
+    2. The complete main text of the article (as plain text, preserving paragraphs but removing any formatting)
+    3. The author's name if available (as plain text)
+    4. The publication date if available (as plain text)
+    
+    IMPORTANT: 
+    - Return all text as plain text without any markdown (**, __, etc.), HTML tags, or special formatting
+    - Preserve the original paragraphs and punctuation
+    - Do not modify, summarize, or interpret the content
+    - Remove any markdown syntax, HTML tags, or special characters that might be present in the original text
+    """
+_NEWS_SCHEMA = NewsContent.model_json_schema()
+_EXTRACT_PARAMS = {'prompt': _EXTRACT_PROMPT, 'schema': _NEWS_SCHEMA}
+
 class URLAnalyzerInput(BaseModel):
     """
     Input schema for the URLAnalyzer tool.
@@ -64,8 +109,7 @@ class URLAnalyzer(BaseTool):
     
     def extract_urls_from_text(self, text: str) -> List[str]:
         """Extract URLs from a text string"""
-        url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+'
-        return re.findall(url_pattern, text)
+        return _URL_RE.findall(text)
 
     def _run(self, url_input: Optional[Union[str, List[str]]] = None) -> str:
         """
@@ -98,7 +142,7 @@ class URLAnalyzer(BaseTool):
         """
         # Check if FireCrawl client is properly initialized
         if not firecrawl_client:
-            return json.dumps({"error": "FireCrawl client not initialized. Please set FIRECRAWL_API_KEY in .env file.", "success": False})
+            return orjson.dumps({"error": "FireCrawl client not initialized. Please set FIRECRAWL_API_KEY in .env file.", "success": False}).decode()
 
         # If no URL input was provided, try to extract from context
         if not url_input:
@@ -112,77 +156,69 @@ class URLAnalyzer(BaseTool):
         
         # If we still don't have URLs, return an error
         if not url_input:
-            return json.dumps({"error": "No URLs provided. Please provide one or more URLs to analyze.", "success": False})
+            return orjson.dumps({"error": "No URLs provided. Please provide one or more URLs to analyze.", "success": False}).decode()
             
         # Normalize input to always work with a list of URLs
         urls = [url_input] if isinstance(url_input, str) else url_input
         
         # Validate URLs have proper format (http:// or https://)
-        valid_urls = [url for url in urls if url and isinstance(url, str) and 
-                     (url.startswith('http://') or url.startswith('https://'))]
+        valid_urls = [url for url in urls if isinstance(url, str) and url.startswith(('http://', 'https://'))]
         
         if not valid_urls:
-            return json.dumps({"error": "No valid URLs provided", "success": False})
+            return orjson.dumps({"error": "No valid URLs provided", "success": False}).decode()
+        
+        # Process URLs concurrently (each extraction is a slow network call)
+        # and store results in input order
+        max_workers = min(FIRECRAWL_MAX_WORKERS, len(valid_urls))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = dict(zip(valid_urls, pool.map(self._extract_url, valid_urls)))
+        
+        # Return all results as JSON
+        return orjson.dumps({"results": results}).decode()
         
-        # Process each URL and store results
-        results = {}
-        for url in valid_urls:
-            try:
-                # Use FireCrawl's extract endpoint to get structured content
-                response = firecrawl_client.extract(
-                    urls=[url],
-                    params={
-                        'prompt': """
-                        Extract the following information from the news article EXACTLY as it appears on the page, but remove any markdown formatting, HTML tags, or special characters:
-                        1. The main title of the article (as plain text, no formatting)
-                        2. The complete main text of the article (as plain text, preserving paragraphs but removing any formatting)
-                        3. The author's name if available (as plain text)
-                        4. The publication date if available (as plain text)
-                        
-                        IMPORTANT: 
-                        - Return all text as plain text without any markdown (**, __, etc.), HTML tags, or special formatting
-                        - Preserve the original paragraphs and punctuation
-                        - Do not modify, summarize, or interpret the content
-                        - Remove any markdown syntax, HTML tags, or special characters that might be present in the original text
-                        """,
-                        'schema': NewsContent.model_json_schema()
-                    }
-                )
+    def _extract_url(self, url: str) -> Dict[str, Any]:
+        """
+        Extracts content from a single URL with FireCrawl.
+        
+        Args:
+            url: URL to process
+            
+        Returns:
+            Dictionary with extracted content, or with the error if extraction failed
+        """
+        try:
+            # Use FireCrawl's extract endpoint to get structured content,
+            # retrying transient failures
+            def extract():
+                response = firecrawl_client.extract(urls=[url], params=_EXTRACT_PARAMS)
                 
                 # Validate response format
                 if not response or not response.get('success'):
                     raise ValueError(f"Invalid response from FireCrawl for URL: {url}")
-                
-                # Store extracted content in results
-                results[url] = {
-                    "title": response['data'].get('title', ''),
-                    "main_text": response['data'].get('main_text', ''),
-                    "author": response['data'].get('author', ''),
-                    "published_date": response['data'].get('published_date', ''),
-                    "url": url,
-                    "success": True
-                }
-                
-            except Exception as e:
-                # Handle any errors during processing
-                results[url] = {
-                    "url": url,
-                    "success": False,
-                    "error": str(e)
-                }
-        
-        # Return all results as JSON
-        return json.dumps({"results": results})
+                return response
+            
+            response = _retry(extract)
+            
+            return {
+                "title": response['data'].get('title', ''),
+                "main_text": response['data'].get('main_text', ''),
+                "author": response['data'].get('author', ''),
+                "published_date": response['data'].get('published_date', ''),
+                "url": url,
+                "success": True
+            }
+            
+        except Exception as e:
+            # Handle any errors during processing
+            return {
+                "url": url,
+                "success": False,
+                "error": str(e)
+            }
         
     def get_current_context(self) -> Optional[str]:
         """
         Get the context from the current execution state.
         This is a helper method to access the task context at runtime.
         """
-        try:
-            # Access the task context through the CrewAI API
-            from crewai.task import Task
-            return getattr(self, "context", None)
-        except (ImportError, AttributeError):
-            logger.warning("Could not access task context")
-            return None 
\ No newline at end of file
+        return getattr(self, "context", None) 
\ No newline at end of file
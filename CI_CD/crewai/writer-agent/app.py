@@ -1,14 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, abort
+from flask import Flask, render_template, request, redirect, url_for, flash, abort, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, update, delete, bindparam, event, func, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import load_only
 from datetime import datetime
-from news_agency import NewsAgencyCrew
-import json
+import orjson
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
 from dotenv import load_dotenv
 import os
 import logging
+import logging.handlers
+import atexit
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
 try:
     import wandb
@@ -17,15 +26,19 @@ except ImportError:
     WANDB_AVAILABLE = False
     print("Warning: wandb not available. Install it with 'pip install wandb'")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging. Log calls only enqueue the record; a background listener
+# thread formats it and writes it to the file and console.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [logging.FileHandler("app.log"), logging.StreamHandler()]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
@@ -67,11 +80,34 @@ if DB_TYPE == 'postgres':
     else:
         app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
         logger.info(f"Using PostgreSQL database at {DB_HOST}:{DB_PORT}/{DB_NAME} without SSL")
+    
+    # Connection pool shared by request threads and background generation workers
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_pre_ping': True,  # Detect connections dropped by the server
+        'pool_recycle': 1800,  # Recycle connections older than 30 minutes
+        'pool_use_lifo': True,
+        # Group INSERT/UPDATE executemany calls into batched statements
+        'executemany_mode': 'values_plus_batch',
+    }
 else:
     # SQLite configuration (default)
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///news_v3.db'
     logger.info("Using SQLite database")
-
+    
+    # Allow connections to be used from background generation workers and
+    # wait for the database lock instead of failing while a worker writes
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_pre_ping': True,
+        'connect_args': {'check_same_thread': False, 'timeout': 30},
+    }
+
+# Rows per statement when a multi-row INSERT is batched (both dialects)
+app.config['SQLALCHEMY_ENGINE_OPTIONS']['insertmanyvalues_page_size'] = 1000
+# Encode and decode JSON columns (article URLs) with orjson
+app.config['SQLALCHEMY_ENGINE_OPTIONS']['json_serializer'] = lambda obj: orjson.dumps(obj).decode()
+app.config['SQLALCHEMY_ENGINE_OPTIONS']['json_deserializer'] = orjson.loads
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
@@ -82,6 +118,24 @@ login_manager.login_view = 'login'
 login_manager.login_message = 'Please login to access this page.'
 login_manager.login_message_category = 'info'
 
+# Number of articles shown per page on the index page
+ARTICLES_PER_PAGE = 20
+
+# Shared worker pool for background article generation.
+# Bounded so that a burst of requests cannot exhaust threads or DB connections.
+GEN_WORKERS = int(os.getenv('GEN_WORKERS', '4'))
+EXECUTOR = ThreadPoolExecutor(max_workers=GEN_WORKERS, thread_name_prefix='article-gen')
+atexit.register(EXECUTOR.shutdown, wait=False)
+
+# Argon2id password hasher, tuned to roughly 250 ms per hash.
+# Hashes created by werkzeug (pbkdf2/scrypt) are still accepted and are
+# upgraded to Argon2 on the next successful login.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
+# Verified against when the username does not exist, so that failed logins
+# take the same time whether or not the user is registered
+DUMMY_HASH = password_hasher.hash('dummy-password')
+
 class User(UserMixin, db.Model):
     """User model for authentication and article ownership"""
     id = db.Column(db.Integer, primary_key=True)
@@ -92,56 +146,134 @@ class User(UserMixin, db.Model):
 
     def set_password(self, password):
         """Set password hash from plain text password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        """Check if plain text password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        """
+        Check if plain text password matches hash.
+        Rehashes the password (without committing) when the stored hash is
+        a legacy werkzeug hash or uses outdated Argon2 parameters.
+        """
+        if not self.password_hash.startswith('$argon2'):
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+
+        try:
+            password_hasher.verify(self.password_hash, password)
+        except (VerifyMismatchError, InvalidHashError):
+            return False
+        if password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
 class Article(db.Model):
     """Article model for storing generated news articles"""
     id = db.Column(db.Integer, primary_key=True)
     topic = db.Column(db.String(200), nullable=False)
-    urls = db.Column(db.Text, nullable=False)  # Stored as JSON string
+    urls = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=False)  # List of source URLs
     content = db.Column(db.Text, nullable=False)
     summary = db.Column(db.String(250), nullable=True)  # Brief description for social media and SEO
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, processing, completed, error
+    generated_at = db.Column(db.DateTime, nullable=True)  # Set by the database when generation completes
 
     def set_urls(self, url_list):
-        """Convert URL list to JSON string for storage"""
-        self.urls = json.dumps(url_list)
+        """Store URL list; the column type handles serialization"""
+        self.urls = list(url_list)
 
     def get_urls(self):
-        """Convert stored JSON string to URL list"""
-        return json.loads(self.urls)
+        """Return stored URL list"""
+        urls = self.urls
+        if isinstance(urls, str):
+            # Row in a database created when the column was a JSON string in TEXT
+            return orjson.loads(urls)
+        return urls
+
+# Serves the per-user listing on the index page (filter by user, newest first)
+article_user_created_index = db.Index('ix_article_user_created', Article.user_id, Article.created_at.desc())
+
+# Lookup by the unique (indexed) username, built once and reused by every caller
+USER_BY_USERNAME = select(User).where(User.username == bindparam('username'))
+
+# Cache of authenticated users so that not every request hits the database
+_USER_CACHE = TTLCache(maxsize=1024, ttl=int(os.getenv('USER_CACHE_TTL', '300')))
+_USER_LOCK = threading.Lock()
+
+def invalidate_user_cache(user_id):
+    """Remove user from the login cache (on logout or account changes)"""
+    with _USER_LOCK:
+        _USER_CACHE.pop(int(user_id), None)
 
 @login_manager.user_loader
 def load_user(user_id):
     """Load user by ID for Flask-Login"""
-    return db.session.get(User, int(user_id))
+    user_id = int(user_id)
+    with _USER_LOCK:
+        cached = _USER_CACHE.get(user_id)
+    
+    if cached is None:
+        user = db.session.get(User, user_id)
+        if user:
+            with _USER_LOCK:
+                _USER_CACHE[user_id] = (user.id, user.username)
+        return user
+    
+    # Build a detached user from the cached fields, no DB round-trip needed
+    cached_id, username = cached
+    return User(id=cached_id, username=username)
 
 def create_default_admin():
-    """Create default admin user if it doesn't exist"""
+    """
+    Create default admin user if it doesn't exist.
+    Does not commit; the caller owns the transaction.
+    """
     default_admin = os.getenv('DEFAULT_ADMIN_USERNAME', 'admin')
     default_password = os.getenv('DEFAULT_ADMIN_PASSWORD', 'admin123')
     
-    if not db.session.query(User).filter_by(username=default_admin).first():
+    if not db.session.scalar(USER_BY_USERNAME, {'username': default_admin}):
         logger.info(f"Creating default admin user: {default_admin}")
         admin = User(username=default_admin)
         admin.set_password(default_password)
         db.session.add(admin)
-        db.session.commit()
-        logger.info("Default admin user created successfully")
+        logger.info("Default admin user added to the session")
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection: WAL lets the article page read while a
+    worker writes, NORMAL sync drops the per-commit fsync of the rollback
+    journal, and mmap serves reads without read() syscalls.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _add_missing_columns():
+    """Add columns introduced after the first release to existing tables (create_all doesn't alter tables)"""
+    article_columns = {column['name'] for column in inspect(db.engine).get_columns('article')}
+    if 'generated_at' not in article_columns:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE article ADD COLUMN generated_at TIMESTAMP'))
+        logger.info("Added generated_at column to article table")
 
 # Initialize database and create default admin
 with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', _set_sqlite_pragmas)
     try:
         logger.info("Initializing database")
         # Always create tables when starting the application
         db.create_all()
+        _add_missing_columns()
+        # create_all skips indexes of tables that already exist
+        article_user_created_index.create(db.engine, checkfirst=True)
         create_default_admin()
+        db.session.commit()
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
 
@@ -155,16 +287,25 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        user = User.query.filter_by(username=username).first()
+        user = db.session.scalar(USER_BY_USERNAME, {'username': username})
         
-        if user and user.check_password(password):
+        if user is None:
+            try:
+                password_hasher.verify(DUMMY_HASH, password)
+            except VerifyMismatchError:
+                pass
+        elif user.check_password(password):
+            if db.session.is_modified(user):
+                # Persist the upgraded password hash
+                db.session.commit()
             login_user(user)
             logger.info(f"User logged in: {username}")
             next_page = request.args.get('next')
             return redirect(next_page or url_for('index'))
-        else:
-            flash('Invalid username or password', 'danger')
-            logger.warning(f"Failed login attempt for username: {username}")
+        
+        # Same response for unknown users and wrong passwords
+        flash('Invalid username or password', 'danger')
+        logger.warning(f"Failed login attempt for username: {username}")
     
     return render_template('login.html')
 
@@ -173,6 +314,7 @@ def login():
 def logout():
     """Handle user logout"""
     username = current_user.username
+    invalidate_user_cache(current_user.id)
     logout_user()
     logger.info(f"User logged out: {username}")
     flash('You have been successfully logged out', 'success')
@@ -193,7 +335,7 @@ def register():
             flash('Passwords do not match', 'danger')
             return redirect(url_for('register'))
             
-        existing_user = User.query.filter_by(username=username).first()
+        existing_user = db.session.scalar(USER_BY_USERNAME, {'username': username})
         if existing_user:
             flash('User with this username already exists', 'danger')
             return redirect(url_for('register'))
@@ -218,9 +360,18 @@ def register():
 @app.route('/')
 @login_required
 def index():
-    """Display user's articles"""
-    articles = Article.query.filter_by(user_id=current_user.id).order_by(Article.created_at.desc()).all()
-    return render_template('index.html', articles=articles)
+    """Display user's articles, one page at a time"""
+    # page and per_page are read from the query string (?page=2&per_page=20)
+    pagination = db.paginate(
+        select(Article)
+        # Only load the columns the listing renders, leaving out the article body
+        .options(load_only(Article.id, Article.topic, Article.urls, Article.created_at, Article.status))
+        .where(Article.user_id == current_user.id)
+        .order_by(Article.created_at.desc()),
+        per_page=ARTICLES_PER_PAGE,
+        max_per_page=100,
+    )
+    return render_template('index.html', articles=pagination.items, pagination=pagination)
 
 def generate_article_async(article_id, urls=None, topic=None, wandb_run=None):
     """
@@ -240,50 +391,44 @@ def generate_article_async(article_id, urls=None, topic=None, wandb_run=None):
                 logger.error(f"Article not found for ID: {article_id}")
                 return
             
+            # Get topic and URLs from article if not provided; read before the
+            # commit below, which expires the loaded attributes
+            topic = topic or article.topic
+            urls = urls or article.get_urls()
+            
             # Update status to processing
             article.status = 'processing'
             db.session.commit()
             logger.info(f"Article status updated to 'processing' for ID: {article_id}")
             
-            # Get topic and URLs from article if not provided
-            topic = topic or article.topic
-            urls = urls or article.get_urls()
-            
             logger.info(f"Starting async article generation for topic '{topic}' with {len(urls)} URLs")
             
-            # Initialize CrewAI
+            # Generate article with CrewAI; no transaction is held open meanwhile.
+            # Imported here so that web workers only load crewai, FireCrawl and
+            # weave once they actually generate an article
+            from news_agency import NewsAgencyCrew
             crew = NewsAgencyCrew()
+            result = crew.run_crew(urls, topic)
             
-            try:
-                # Generate article with CrewAI
-                result = crew.run_crew(urls, topic)
-                
-                # Update article with generated content
-                article.content = result.get('content', 'No content generated')
-                article.summary = result.get('summary', '')
-                article.status = 'completed'
-                article.generated_at = datetime.utcnow()
-                db.session.commit()
-                logger.info(f"Article successfully generated with CrewAI")
-                logger.info(f"Article updated with generated content for ID: {article_id}")
-                
-            except Exception as e:
-                logger.error(f"Error in CrewAI generation: {str(e)}")
-                article.content = f"Error generating article: {str(e)}"
-                article.status = 'error'
-                db.session.commit()
-                logger.error(f"Article status updated to 'error' for ID: {article_id}")
-                logger.error(f"Error generating article: {str(e)}")
+            # Update article with generated content in a single commit
+            article.content = result.get('content', 'No content generated')
+            article.summary = result.get('summary', '')
+            article.status = 'completed'
+            article.generated_at = func.now()  # Evaluated by the database in the same UPDATE
+            db.session.commit()
+            logger.info(f"Article updated with generated content for ID: {article_id}")
         
         except Exception as e:
-            logger.error(f"Error in async article generation: {str(e)}")
+            logger.error(f"Error generating article {article_id}: {str(e)}")
             try:
-                article = db.session.get(Article, article_id)
-                if article:
-                    article.status = 'error'
-                    article.content = f"Error: {str(e)}"
-                    db.session.commit()
-                    logger.error(f"Article status updated to 'error' for ID: {article_id}")
+                db.session.rollback()
+                db.session.execute(
+                    update(Article)
+                    .where(Article.id == article_id)
+                    .values(status='error', content=f"Error generating article: {str(e)}")
+                )
+                db.session.commit()
+                logger.error(f"Article status updated to 'error' for ID: {article_id}")
             except Exception as inner_e:
                 logger.error(f"Error updating article status: {str(inner_e)}")
 
@@ -319,14 +464,9 @@ def create():
             article_id = article.id
             logger.info(f"Article created in database with ID: {article_id}, status: pending")
             
-            # Start asynchronous article generation in a separate thread
-            thread = threading.Thread(
-                target=generate_article_async,
-                args=(article_id, urls, topic, None)
-            )
-            thread.daemon = True  # Thread will terminate when the main thread terminates
-            thread.start()
-            logger.info(f"Started async article generation thread for ID: {article_id}")
+            # Queue asynchronous article generation on the worker pool
+            EXECUTOR.submit(generate_article_async, article_id, urls, topic, None)
+            logger.info(f"Queued async article generation for ID: {article_id}")
             
             flash('Article is being generated! You can close this window and come back later.', 'info')
             return redirect(url_for('view_article', article_id=article_id))
@@ -339,6 +479,10 @@ def create():
 
     return render_template('create.html')
 
+def _article_owner(article_id):
+    """Return the owner's user ID of an article (None if it doesn't exist) without loading its content"""
+    return db.session.scalar(select(Article.user_id).where(Article.id == article_id))
+
 @app.route('/article/<int:article_id>')
 @login_required
 def view_article(article_id):
@@ -358,17 +502,17 @@ def view_article(article_id):
 @login_required
 def delete_article(article_id):
     """Delete an article"""
-    article = db.session.get(Article, article_id)
-    if not article:
+    owner_id = _article_owner(article_id)
+    if owner_id is None:
         abort(404)
     
     # Check if article belongs to current user
-    if article.user_id != current_user.id:
+    if owner_id != current_user.id:
         flash('You do not have access to this article', 'danger')
         return redirect(url_for('index'))
     
-    # Delete the article
-    db.session.delete(article)
+    # Delete the article without loading it
+    db.session.execute(delete(Article).where(Article.id == article_id))
     db.session.commit()
     
     flash('Article successfully deleted', 'success')
@@ -379,23 +523,18 @@ def delete_article(article_id):
 def regenerate_article(article_id):
     """Regenerate an existing article"""
     try:
-        # Get the article
-        article = db.session.get(Article, article_id)
-        
         # Check if article exists and belongs to current user
-        if not article or article.user_id != current_user.id:
+        if _article_owner(article_id) != current_user.id:
             flash('Article not found or you do not have permission to regenerate it.', 'danger')
             return redirect(url_for('index'))
         
         # Reset article status to pending
-        article.status = 'pending'
+        db.session.execute(update(Article).where(Article.id == article_id).values(status='pending'))
         db.session.commit()
         flash('Article regeneration started.', 'info')
         
         # Start async regeneration
-        thread = threading.Thread(target=generate_article_async, args=(article_id,))
-        thread.daemon = True
-        thread.start()
+        EXECUTOR.submit(generate_article_async, article_id)
         
         return redirect(url_for('view_article', article_id=article_id))
     except Exception as e:
@@ -403,6 +542,17 @@ def regenerate_article(article_id):
         flash('An error occurred while regenerating the article.', 'danger')
         return redirect(url_for('index'))
 
+@app.route('/article/<int:article_id>/status')
+@login_required
+def article_status(article_id):
+    """Return the generation status of an article, polled by the article page"""
+    row = db.session.execute(
+        select(Article.user_id, Article.status).where(Article.id == article_id)
+    ).first()
+    if not row or row.user_id != current_user.id:
+        abort(404)
+    return jsonify(status=row.status)
+
 @app.errorhandler(404)
 def page_not_found(e):
     """Handle 404 errors"""
@@ -415,6 +565,11 @@ def internal_server_error(e):
     logger.error(f"500 error: {str(e)}")
     return render_template('error.html', error_code=500, message='Internal server error'), 500
 
+# Compile templates up front so the first requests don't pay for parsing
+for template_name in ('index.html', 'article.html', 'login.html', 'register.html', 'create.html', 'error.html'):
+    app.jinja_env.get_template(template_name)
+
 if __name__ == '__main__':
     logger.info("Starting Flask application")
-    app.run(debug=True)
+    # Debug mode (reloader, template auto-reload) only when asked for
+    app.run(debug=os.getenv('FLASK_DEBUG', 'false').lower() == 'true')
@@ -6,7 +6,7 @@ Creates tables and default administrator.
 
 import os
 import logging
-from app import app, db, User, create_default_admin
+from app import app, db, create_default_admin, USER_BY_USERNAME
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,16 +20,17 @@ def init_database():
             db.create_all()
             logger.info("Database tables created successfully")
             
-            logger.info("Creating default admin user...")
-            create_default_admin()
-            logger.info("Default admin user created successfully")
-            
-            # Check that the user has been created
-            admin = User.query.filter_by(username=os.getenv('DEFAULT_ADMIN_USERNAME', 'admin')).first()
-            if admin:
-                logger.info(f"Admin user '{admin.username}' exists")
-            else:
-                logger.warning("Admin user was not created")
+            # Seed and verify the admin in one transaction with a single commit
+            with db.session.begin():
+                logger.info("Creating default admin user...")
+                create_default_admin()
+                
+                # Check that the user has been created
+                admin = db.session.scalar(USER_BY_USERNAME, {'username': os.getenv('DEFAULT_ADMIN_USERNAME', 'admin')})
+                if admin:
+                    logger.info(f"Admin user '{admin.username}' exists")
+                else:
+                    logger.warning("Admin user was not created")
                 
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
@@ -1,11 +1,15 @@
 import os
-import json
+import re
+import orjson
 import logging
 import requests
+import threading
 import concurrent.futures
+from functools import partial
 from typing import List, Dict, Any, Union, Optional
 from datetime import datetime
 from dotenv import load_dotenv
+from cachetools import TTLCache
 from crewai import Agent, Task, Crew, Process
 from crewai.agent import LLM
 from crewai.tools import BaseTool, tool
@@ -29,6 +33,15 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 WANDB_API_KEY = os.getenv("WANDB_API_KEY")
 WANDB_PROJECT = os.getenv("WANDB_PROJECT", "ai-news-agency")
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
+# Maximum number of URLs scraped in parallel
+FIRECRAWL_MAX_WORKERS = int(os.getenv("FIRECRAWL_MAX_WORKERS", "4"))
+# How long (in seconds) a scraped URL is reused before it is scraped again
+FIRECRAWL_CACHE_TTL = int(os.getenv("FIRECRAWL_CACHE_TTL", "3600"))
+
+# Successful analyses by URL, shared by all crews in this process, so that
+# regenerating an article or reusing a source doesn't pay for another scrape
+_url_cache = TTLCache(maxsize=256, ttl=FIRECRAWL_CACHE_TTL)
+_url_cache_lock = threading.Lock()
 
 # Initialize FireCrawl client
 firecrawl_client = None
@@ -41,20 +54,33 @@ try:
 except Exception as e:
     logger.error(f"Error initializing FireCrawl client: {str(e)}")
 
-# Initialize weave for CrewAI tracking
-try:
-    # Check if API key is configured
-    if WANDB_API_KEY and WANDB_API_KEY != "your_wandb_api_key_here":
-        # Initialize weave with project settings
-        import weave
-        weave.init(
-            project_name=WANDB_PROJECT
-        )
-        logger.info(f"Successfully initialized weave for CrewAI tracking")
-    else:
-        logger.warning("Weights & Bianas API key not set. Tracking disabled.")
-except Exception as e:
-    logger.error(f"Error initializing weave: {str(e)}")
+# Weave tracking for CrewAI is initialized once, when the first crew runs,
+# so importing this module doesn't connect to W&B
+_WEAVE_INITIALIZED = False
+_WEAVE_LOCK = threading.Lock()
+
+def _ensure_weave():
+    """Initialize weave for CrewAI tracking once, if an API key is configured"""
+    global _WEAVE_INITIALIZED
+    if _WEAVE_INITIALIZED:
+        return
+    with _WEAVE_LOCK:
+        if _WEAVE_INITIALIZED:
+            return
+        _WEAVE_INITIALIZED = True
+        try:
+            # Check if API key is configured
+            if WANDB_API_KEY and WANDB_API_KEY != "your_wandb_api_key_here":
+                # Initialize weave with project settings
+                import weave
+                weave.init(
+                    project_name=WANDB_PROJECT
+                )
+                logger.info(f"Successfully initialized weave for CrewAI tracking")
+            else:
+                logger.warning("Weights & Bianas API key not set. Tracking disabled.")
+        except Exception as e:
+            logger.error(f"Error initializing weave: {str(e)}")
 
 # Default OpenAI model to use
 DEFAULT_MODEL = LLM(model="gpt-4o-mini", temperature=0)
@@ -62,14 +88,142 @@ DEFAULT_MODEL = LLM(model="gpt-4o-mini", temperature=0)
 # Configure process for CrewAI
 CREW_PROCESS = Process.sequential  # Use sequential process instead of hierarchical
 
+# First markdown heading, used as the title when the page metadata has none
+_TITLE_RE = re.compile(r'#\s+(.+?)(?:\n|$)')
+
+# Editor output "SUMMARY: ... ARTICLE: ..." split in one pass: group 1 is the
+# summary (None when no SUMMARY: precedes the first ARTICLE:), group 2 the article
+_SUMMARY_ARTICLE_RE = re.compile(r'(?:SUMMARY:\s*(.*?)\s*)?ARTICLE:\s*(.*)', re.DOTALL)
+
+# Runs of non-whitespace; \s matches the same characters str.split() splits on
+_WORD_RE = re.compile(r'\S+')
+
+def _word_count(text: str) -> int:
+    """Counts words like len(text.split()) without building the list of words"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+def _leading_paragraphs(text: str, count: int) -> List[str]:
+    """
+    Returns the first `count` non-blank paragraphs (separated by blank lines),
+    same as filtering text.split('\n\n') but without splitting the whole text.
+    """
+    paragraphs = []
+    start = 0
+    while len(paragraphs) < count:
+        end = text.find('\n\n', start)
+        paragraph = text[start:] if end == -1 else text[start:end]
+        if paragraph.strip():
+            paragraphs.append(paragraph)
+        if end == -1:
+            break
+        start = end + 2
+    return paragraphs
+
+def _analyze_url(url: str, force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    Scrapes a single URL with FireCrawl and extracts its content and metadata.
+    Recently analyzed URLs are served from the cache unless force_refresh is set.
+    Never raises; failures are returned as a result with success=False.
+    """
+    if not force_refresh:
+        with _url_cache_lock:
+            cached = _url_cache.get(url)
+        if cached is not None:
+            logger.info(f"Using cached analysis for URL: {url}")
+            return cached
+    
+    try:
+        logger.info(f"Analyzing URL with FireCrawl: {url}")
+        
+        # Call FireCrawl API to get data in markdown format; the agents only
+        # read the markdown text, so HTML isn't requested
+        response = firecrawl_client.scrape_url(
+            url=url, 
+            params={'formats': ['markdown']}
+        )
+        
+        # Check if response is valid
+        if not response or not isinstance(response, dict):
+            raise ValueError(f"Invalid response from FireCrawl for URL: {url}")
+        
+        # Extract content and metadata
+        markdown_content = response.get("markdown", "")
+        metadata = response.get("metadata", {})
+        
+        # Limit content size to prevent token limit errors
+        if markdown_content and len(markdown_content) > 8000:
+            logger.warning(f"Truncating markdown content for URL {url} from {len(markdown_content)} to 8000 characters")
+            markdown_content = f"{markdown_content[:8000]}... [content truncated]"
+        
+        # Extract metadata with fallbacks
+        title = metadata.get("title", "")
+        description = metadata.get("description", "")
+        
+        # Extract title from markdown if not in metadata
+        if not title and markdown_content:
+            title_match = _TITLE_RE.search(markdown_content)
+            if title_match:
+                title = title_match.group(1).strip()
+                logger.info(f"Extracted title from markdown: {title}")
+            elif markdown_content.strip():
+                # Use first line as fallback
+                first_line_end = markdown_content.find('\n')
+                title = (markdown_content if first_line_end == -1 else markdown_content[:first_line_end]).strip()
+                logger.info(f"Using first line as title: {title}")
+        
+        # Extract description from content if not in metadata
+        if not description and markdown_content:
+            paragraphs = _leading_paragraphs(markdown_content, 2)
+            if len(paragraphs) > 1:
+                description = paragraphs[1].strip()
+                logger.info("Extracted description from second paragraph")
+            elif paragraphs:
+                description = paragraphs[0].strip()
+                logger.info("Extracted description from first paragraph")
+            
+            # Limit description length
+            if description and len(description) > 200:
+                description = description[:197] + "..."
+                logger.info("Truncated description to 200 characters")
+        
+        # Store results
+        result = {
+            "title": title,
+            "description": description,
+            "author": metadata.get("author", ""),
+            "published_time": metadata.get("publishedTime", ""),
+            "language": metadata.get("language", ""),
+            "text": markdown_content,
+            "metadata": metadata,
+            "url": url,
+            "success": True,
+            "word_count": _word_count(markdown_content) if markdown_content else 0,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        logger.info(f"Successfully analyzed URL: {url}")
+        with _url_cache_lock:
+            _url_cache[url] = result
+        return result
+    except Exception as e:
+        error_msg = f"Error analyzing URL {url} with FireCrawl: {str(e)}"
+        logger.error(error_msg)
+        return {
+            "url": url,
+            "success": False,
+            "error": error_msg,
+            "timestamp": datetime.now().isoformat()
+        }
+
 # Create a custom tool for URL analysis
 @tool("Analyze URL Content")
-def analyze_url_content(url_input: Union[str, List[str]]) -> str:
+def analyze_url_content(url_input: Union[str, List[str]], force_refresh: bool = False) -> str:
     """
     Universal URL analyzer that processes URLs using FireCrawl to extract content and metadata
     
     Args:
         url_input: Either a single URL string or a list of URL strings
+        force_refresh: Scrape again even if a URL was analyzed recently
         
     Returns:
         JSON string with analysis results including title, content, metadata, and more
@@ -84,117 +238,42 @@ def analyze_url_content(url_input: Union[str, List[str]]) -> str:
     if not valid_urls:
         error_msg = "No valid URLs provided. URLs must start with http:// or https://"
         logger.error(error_msg)
-        return json.dumps({"error": error_msg, "success": False})
+        return orjson.dumps({"error": error_msg, "success": False}).decode()
     
     # Check if FireCrawl client is available
     if not firecrawl_client:
         error_msg = "FireCrawl client not initialized. Please set FIRECRAWL_API_KEY in .env file."
         logger.error(error_msg)
-        return json.dumps({"error": error_msg, "success": False, "urls": valid_urls})
+        return orjson.dumps({"error": error_msg, "success": False, "urls": valid_urls}).decode()
     
     # Process URLs with FireCrawl
     logger.info(f"Using FireCrawl to analyze {len(valid_urls)} URLs")
-    results = {}
     
-    # Process each URL separately
-    for url in valid_urls:
-        try:
-            logger.info(f"Analyzing URL with FireCrawl: {url}")
-            
-            # Call FireCrawl API to get data with markdown and HTML formats
-            response = firecrawl_client.scrape_url(
-                url=url, 
-                params={'formats': ['markdown', 'html']}
-            )
-            
-            # Check if response is valid
-            if not response or not isinstance(response, dict):
-                raise ValueError(f"Invalid response from FireCrawl for URL: {url}")
-            
-            # Extract content and metadata
-            markdown_content = response.get("markdown", "")
-            html_content = response.get("html", "")
-            metadata = response.get("metadata", {})
-            
-            # Limit content size to prevent token limit errors
-            if markdown_content and len(markdown_content) > 8000:
-                logger.warning(f"Truncating markdown content for URL {url} from {len(markdown_content)} to 8000 characters")
-                markdown_content = markdown_content[:8000] + "... [content truncated]"
-            
-            if html_content and len(html_content) > 4000:
-                logger.warning(f"Truncating HTML content for URL {url} from {len(html_content)} to 4000 characters")
-                html_content = html_content[:4000] + "... [content truncated]"
-            
-            # Extract metadata with fallbacks
-            title = metadata.get("title", "")
-            description = metadata.get("description", "")
-            
-            # Extract title from markdown if not in metadata
-            if not title and markdown_content:
-                import re
-                title_match = re.search(r'#\s+(.+?)(?:\n|$)', markdown_content)
-                if title_match:
-                    title = title_match.group(1).strip()
-                    logger.info(f"Extracted title from markdown: {title}")
-                elif markdown_content.strip():
-                    # Use first line as fallback
-                    title = markdown_content.split('\n')[0].strip()
-                    logger.info(f"Using first line as title: {title}")
-            
-            # Extract description from content if not in metadata
-            if not description and markdown_content:
-                paragraphs = [p for p in markdown_content.split('\n\n') if p.strip()]
-                if len(paragraphs) > 1:
-                    description = paragraphs[1].strip()
-                    logger.info("Extracted description from second paragraph")
-                elif paragraphs:
-                    description = paragraphs[0].strip()
-                    logger.info("Extracted description from first paragraph")
-                
-                # Limit description length
-                if description and len(description) > 200:
-                    description = description[:197] + "..."
-                    logger.info("Truncated description to 200 characters")
-            
-            # Store results
-            results[url] = {
-                "title": title,
-                "description": description,
-                "author": metadata.get("author", ""),
-                "published_time": metadata.get("publishedTime", ""),
-                "language": metadata.get("language", ""),
-                "text": markdown_content,
-                "html": html_content,
-                "metadata": metadata,
-                "url": url,
-                "success": True,
-                "word_count": len(markdown_content.split()) if markdown_content else 0,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            logger.info(f"Successfully analyzed URL: {url}")
-        except Exception as e:
-            error_msg = f"Error analyzing URL {url} with FireCrawl: {str(e)}"
-            logger.error(error_msg)
-            results[url] = {
-                "url": url,
-                "success": False,
-                "error": error_msg,
-                "timestamp": datetime.now().isoformat()
-            }
+    # Scrape URLs concurrently; the work is waiting on the network, so threads
+    # overlap the round trips. map() keeps results in the order of the input.
+    max_workers = min(len(valid_urls), FIRECRAWL_MAX_WORKERS)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(valid_urls, executor.map(partial(_analyze_url, force_refresh=force_refresh), valid_urls)))
     
-    # Add summary statistics
+    # Add summary statistics, collected in a single pass over the results
+    successful = failed = total_word_count = 0
+    for result in results.values():
+        if result.get("success", False):
+            successful += 1
+            total_word_count += result.get("word_count", 0)
+        else:
+            failed += 1
     summary = {
         "total_urls": len(valid_urls),
-        "successful": sum(1 for url in results if results[url].get("success", False)),
-        "failed": sum(1 for url in results if not results[url].get("success", False)),
-        "total_word_count": sum(results[url].get("word_count", 0) for url in results if results[url].get("success", False))
+        "successful": successful,
+        "failed": failed,
+        "total_word_count": total_word_count
     }
     
     logger.info(f"Analysis summary: {summary}")
     
     # Return results as JSON
-    return json.dumps({"results": results, "summary": summary})
+    return orjson.dumps({"results": results, "summary": summary}).decode()
 
 class NewsAgencyCrew:
     """
@@ -206,7 +285,11 @@ class NewsAgencyCrew:
         """Initialize the NewsAgencyCrew"""
 
     def create_agents(self):
-        """Create and configure all the AI agents needed for the news generation process"""
+        """
+        Create and configure all the AI agents needed for the news generation process.
+        Built fresh for every run: agents keep per-run state (e.g. the retry
+        counter checked against max_retry_limit) that a new crew doesn't reset.
+        """
         # URL Research Journalist
         url_researcher = Agent(
             role='URL Research Journalist',
@@ -405,6 +488,8 @@ class NewsAgencyCrew:
             Dictionary with article content and summary
         """
         try:
+            _ensure_weave()
+            
             # Create agents
             url_researcher, aggregator, writer, editor = self.create_agents()
             
@@ -430,19 +515,16 @@ class NewsAgencyCrew:
             summary = ""
             content = str(result)
             
-            # Look for the SUMMARY: marker in the result
-            if "SUMMARY:" in content and "ARTICLE:" in content:
-                parts = content.split("ARTICLE:", 1)
-                summary_part = parts[0]
-                content_part = parts[1].strip()
-                
+            # Look for the SUMMARY: and ARTICLE: markers in the result
+            match = _SUMMARY_ARTICLE_RE.search(content)
+            if match and (match.group(1) is not None or "SUMMARY:" in match.group(2)):
                 # Extract summary
-                if "SUMMARY:" in summary_part:
-                    summary = summary_part.split("SUMMARY:", 1)[1].strip()
+                if match.group(1) is not None:
+                    summary = match.group(1)
                     logger.info(f"Extracted summary: {summary[:100]}...")
                 
                 # Use content part as the main content
-                content = content_part
+                content = match.group(2).strip()
                 logger.info(f"Extracted article content of length: {len(content)}")
             
             return {
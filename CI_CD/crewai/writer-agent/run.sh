@@ -35,8 +35,8 @@ echo -e "${GREEN}Application will be available at: http://localhost:5000${NC}"
 echo -e "${YELLOW}Press Ctrl+C to stop${NC}"
 echo ""
 
-# Run with error handling
-python app.py
+# Run with error handling (debug mode for local development)
+FLASK_DEBUG=${FLASK_DEBUG:-true} python app.py
 if [ $? -ne 0 ]; then
     echo -e "${RED}An error occurred while starting the application.${NC}"
     echo -e "${YELLOW}Check that all dependencies are installed correctly.${NC}"